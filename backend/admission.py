@@ -0,0 +1,82 @@
+"""
+Admission control - sheds expensive work when the audio generation backlog
+or event loop lag shows the server is overloaded
+"""
+import asyncio
+import time
+from typing import Optional
+from fastapi import Depends, HTTPException, status
+from auth import get_current_user_id
+from config import settings
+from scheduler import scheduler
+from metrics import event_loop_lag_seconds, requests_shed_total
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Past this multiple of MAX_GENERATION_BACKLOG everyone is shed, not just users with queued work
+HARD_BACKLOG_FACTOR = 2
+
+
+class AdmissionController:
+    """Tracks server load and decides whether to accept new expensive work"""
+
+    def __init__(self):
+        self.loop_lag = 0.0
+
+    @property
+    def generation_backlog(self) -> int:
+        return scheduler.backlog
+
+    async def monitor_loop_lag(self):
+        """Measure how late the event loop wakes up from a short sleep"""
+        interval = settings.loop_lag_check_interval
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lag = max(0.0, time.perf_counter() - started - interval)
+            # Smooth so a single slow tick doesn't flip shedding on and off
+            self.loop_lag = 0.7 * self.loop_lag + 0.3 * lag
+            event_loop_lag_seconds.set(self.loop_lag)
+
+    def overloaded(self, backlog_limit: Optional[int]) -> Optional[str]:
+        """Reason the server is overloaded, or None. A backlog_limit of None ignores the backlog."""
+        if self.loop_lag * 1000 > settings.max_event_loop_lag_ms:
+            return f"event loop lag {self.loop_lag * 1000:.0f}ms"
+        if backlog_limit is not None and self.generation_backlog >= backlog_limit:
+            return f"generation backlog {self.generation_backlog}"
+        return None
+
+    def shed_if_overloaded(self, kind: str, backlog_limit: Optional[int]):
+        """Raise 503 with Retry-After when the server can't take this request"""
+        reason = self.overloaded(backlog_limit)
+        if reason is None:
+            return
+        requests_shed_total.labels(kind).inc()
+        logger.warning(f"Shedding {kind} request: {reason}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Server is busy, please retry later",
+            headers={"Retry-After": str(settings.shed_retry_after_seconds)}
+        )
+
+
+admission = AdmissionController()
+
+
+async def admit_synthesis(user_id: str = Depends(get_current_user_id)):
+    """
+    Dependency for routes that start new TTS work. Between MAX_GENERATION_BACKLOG
+    and HARD_BACKLOG_FACTOR times that, only users who already have articles
+    queued are turned away, so one bulk import can't lock everyone else out;
+    past it, everyone is.
+    """
+    limit = settings.max_generation_backlog
+    if not scheduler.queued_for(user_id):
+        limit *= HARD_BACKLOG_FACTOR
+    admission.shed_if_overloaded("synthesis", backlog_limit=limit)
+
+
+async def admit_expensive_read():
+    """Dependency for heavy listing routes, shed only when the event loop is lagging"""
+    admission.shed_if_overloaded("listing", backlog_limit=None)
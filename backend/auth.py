@@ -15,6 +15,11 @@ from bson import ObjectId
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
+# Purpose claims of event stream tickets, which are only good for opening GET /events:
+# a ticket from POST /events/ticket, and the resume id a stream hands out for reconnecting
+EVENTS_TICKET = "events"
+EVENTS_RESUME = "events_resume"
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
@@ -38,8 +43,22 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+def create_stream_ticket(email: str, purpose: str = EVENTS_TICKET, seconds: Optional[int] = None) -> str:
+    """Short-lived token for ?ticket=, since EventSource can't send headers"""
+    expires = timedelta(seconds=seconds or settings.events_ticket_seconds)
+    return create_access_token({"sub": email, "purpose": purpose}, expires_delta=expires)
+
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Get current authenticated user from JWT token"""
+    return await get_user_from_token(credentials.credentials)
+
+
+async def get_user_from_token(token: str, purpose: Optional[str] = None):
+    """
+    Look up the user a JWT belongs to, raising 401 if it isn't valid.
+    Single-purpose tokens are only accepted where that purpose is asked for.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -47,10 +66,9 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     )
     
     try:
-        token = credentials.credentials
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         email: str = payload.get("sub")
-        if email is None:
+        if email is None or payload.get("purpose") != purpose:
             raise credentials_exception
         token_data = TokenData(email=email)
     except JWTError:
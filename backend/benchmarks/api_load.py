@@ -0,0 +1,380 @@
+"""
+Load benchmark for the API
+
+Runs the FastAPI app under uvicorn in a background thread against an
+in-memory MongoDB stand-in (or a real local MongoDB) and a fake TTS
+server, then drives a weighted mix of register, login, article,
+collection and play-position traffic. Reports throughput and p50/p99
+per route, plus an audio generation throughput scenario, and compares
+the run with a baseline file so regressions show up across commits.
+
+Run from the backend directory:
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/api_load.py                      # compare with baseline.json
+    python benchmarks/api_load.py --save-baseline      # record a new baseline
+    python benchmarks/api_load.py --mongodb-url mongodb://localhost:27017
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+import logging
+from pathlib import Path
+
+BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+API_PORT = 8765
+TTS_PORT = 5995
+MIN_SAMPLES = 100  # Routes with fewer samples are too noisy to compare
+
+# Configure the app before it is imported
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ["LOCAL_STORAGE_PATH"] = tempfile.mkdtemp(prefix="readaloud-bench-")
+os.environ["TTS_HEALTH_CHECK_INTERVAL"] = "0"
+os.environ["TTS_SERVER_URLS"] = f"http://127.0.0.1:{TTS_PORT}"
+
+import aiohttp  # noqa: E402
+import uvicorn  # noqa: E402
+
+# Relative weights of each operation in the traffic mix
+TRAFFIC_MIX = {
+    "login": 2,
+    "register": 1,
+    "create_article": 6,
+    "list_articles": 30,
+    "get_article": 12,
+    "list_collections": 15,
+    "create_collection": 2,
+    "update_position": 31,
+}
+
+WORDS = (
+    "the quick brown fox jumps over a lazy dog while reading long articles about "
+    "distributed systems latency caching queues storage and speech synthesis"
+).split()
+
+
+def make_text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)) + "."
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+class ApiServer:
+    """Runs the app under uvicorn on its own event loop in a daemon thread"""
+
+    def __init__(self, mongodb_url: str = None):
+        self.mongodb_url = mongodb_url
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        import main
+        from config import settings
+        from database import mongodb, connect_to_mongo, close_mongo_connection
+        from tts_service import tts_service
+        from scheduler import scheduler
+
+        logging.getLogger().setLevel(logging.WARNING)
+
+        async def serve():
+            if self.mongodb_url:
+                settings.mongodb_url = self.mongodb_url
+                settings.database_name = f"readaloud_bench_{os.getpid()}"
+                await connect_to_mongo()
+            else:
+                from mongomock_motor import AsyncMongoMockClient
+                mongodb.client = AsyncMongoMockClient()
+            await scheduler.start()
+            self.server = uvicorn.Server(uvicorn.Config(
+                main.app, host="127.0.0.1", port=API_PORT, log_level="warning", lifespan="off"
+            ))
+            try:
+                await self.server.serve()
+            finally:
+                await tts_service.pool.close()
+                if self.mongodb_url:
+                    await mongodb.client.drop_database(settings.database_name)
+                    await close_mongo_connection()
+
+        self.thread = threading.Thread(target=lambda: asyncio.run(serve()), daemon=True)
+        self.thread.start()
+        while self.server is None or not self.server.started:
+            time.sleep(0.05)
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    async def call(self, session, route: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        async with session.request(method, url, **kwargs) as response:
+            body = await response.read()
+        elapsed = time.perf_counter() - started
+        if response.status >= 400:
+            self.errors[route] += 1
+            return None
+        self.latencies[route].append(elapsed)
+        return json.loads(body) if body else None
+
+
+class VirtualUser:
+    def __init__(self, email: str):
+        self.email = email
+        self.password = "benchmark-password"
+        self.headers = {}
+        self.article_ids = []
+        self.collection_ids = []
+
+
+async def setup_users(session, base: str, recorder: Recorder, count: int, rng: random.Random) -> list[VirtualUser]:
+    """Register, log in and seed a few articles and a collection for each user"""
+    users = []
+    for i in range(count):
+        user = VirtualUser(f"bench-{i}-{rng.randrange(1 << 30)}@example.com")
+        await recorder.call(session, "register", "POST", f"{base}/auth/register",
+                            json={"email": user.email, "password": user.password})
+        await login(session, base, recorder, user)
+        collection = await recorder.call(session, "create_collection", "POST", f"{base}/collections",
+                                         json={"name": "Seed"}, headers=user.headers)
+        user.collection_ids.append(collection["id"])
+        for _ in range(5):
+            await create_article(session, base, recorder, user, rng)
+        users.append(user)
+    return users
+
+
+async def login(session, base, recorder, user):
+    token = await recorder.call(session, "login", "POST", f"{base}/auth/login",
+                                json={"email": user.email, "password": user.password})
+    user.headers = {"Authorization": f"Bearer {token['access_token']}"}
+
+
+async def create_article(session, base, recorder, user, rng):
+    article = await recorder.call(session, "create_article", "POST", f"{base}/articles", json={
+        "title": make_text(rng, 6),
+        "content": make_text(rng, rng.randint(100, 400)),
+        "collection_id": rng.choice(user.collection_ids),
+    }, headers=user.headers)
+    if article:
+        user.article_ids.append(article["id"])
+
+
+async def run_operation(op: str, session, base, recorder, users, rng):
+    user = rng.choice(users)
+    if op == "login":
+        await login(session, base, recorder, user)
+    elif op == "register":
+        await recorder.call(session, "register", "POST", f"{base}/auth/register",
+                            json={"email": f"new-{rng.randrange(1 << 40)}@example.com", "password": "pw-123456"})
+    elif op == "create_article":
+        await create_article(session, base, recorder, user, rng)
+    elif op == "list_articles":
+        await recorder.call(session, op, "GET", f"{base}/articles?limit=50", headers=user.headers)
+    elif op == "get_article":
+        await recorder.call(session, op, "GET", f"{base}/articles/{rng.choice(user.article_ids)}",
+                            headers=user.headers)
+    elif op == "list_collections":
+        await recorder.call(session, op, "GET", f"{base}/collections", headers=user.headers)
+    elif op == "create_collection":
+        collection = await recorder.call(session, op, "POST", f"{base}/collections",
+                                         json={"name": make_text(rng, 2)}, headers=user.headers)
+        if collection:
+            user.collection_ids.append(collection["id"])
+    elif op == "update_position":
+        await recorder.call(session, op, "PATCH", f"{base}/articles/{rng.choice(user.article_ids)}",
+                            json={"play_position_seconds": rng.randint(0, 600)}, headers=user.headers)
+
+
+async def mixed_traffic(base: str, args) -> dict:
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    async with aiohttp.ClientSession() as session:
+        users = await setup_users(session, base, recorder, args.users, rng)
+        recorder = Recorder()  # Only measure the steady-state mix
+
+        ops = list(TRAFFIC_MIX)
+        weights = [TRAFFIC_MIX[op] for op in ops]
+        schedule = rng.choices(ops, weights=weights, k=args.requests)
+        queue = iter(schedule)
+
+        async def worker(worker_rng):
+            for op in queue:
+                await run_operation(op, session, base, recorder, users, worker_rng)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(random.Random(args.seed + i)) for i in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    routes = {}
+    for route in ops:
+        samples = recorder.latencies[route]
+        routes[route] = {
+            "count": len(samples),
+            "errors": recorder.errors[route],
+            "p50_ms": round(percentile(samples, 50) * 1000, 2),
+            "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        }
+    total = sum(len(s) for s in recorder.latencies.values())
+    return {"throughput_rps": round(total / elapsed, 1), "routes": routes}
+
+
+async def generation_throughput(base: str, args) -> dict:
+    """Save a burst of articles and time how long until all have audio"""
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    async with aiohttp.ClientSession() as session:
+        user = VirtualUser(f"gen-{rng.randrange(1 << 30)}@example.com")
+        await recorder.call(session, "register", "POST", f"{base}/auth/register",
+                            json={"email": user.email, "password": user.password})
+        await login(session, base, recorder, user)
+        collection = await recorder.call(session, "create_collection", "POST", f"{base}/collections",
+                                         json={"name": "Generation"}, headers=user.headers)
+        user.collection_ids.append(collection["id"])
+
+        started = time.perf_counter()
+        await asyncio.gather(*(create_article(session, base, recorder, user, rng) for _ in range(args.articles)))
+        pending = set(user.article_ids)
+        ready_at = []
+        deadline = started + args.generation_timeout
+        while pending and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+            listing = await recorder.call(session, "poll", "GET",
+                                          f"{base}/articles?limit={args.articles}", headers=user.headers)
+            for article in listing or []:
+                if article["id"] in pending and article["audio_url"]:
+                    pending.discard(article["id"])
+                    ready_at.append(time.perf_counter() - started)
+        elapsed = time.perf_counter() - started
+
+    return {
+        "articles": args.articles,
+        "completed": len(ready_at),
+        "articles_per_second": round(len(ready_at) / elapsed, 2),
+        "p50_ready_ms": round(percentile(ready_at, 50) * 1000, 1),
+        "p99_ready_ms": round(percentile(ready_at, 99) * 1000, 1),
+    }
+
+
+def print_report(results: dict):
+    mixed = results["mixed"]
+    print(f"\nMixed traffic: {mixed['throughput_rps']} req/s")
+    print(f"{'route':<20}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    for route, stats in mixed["routes"].items():
+        print(f"{route:<20}{stats['count']:>8}{stats['errors']:>8}{stats['p50_ms']:>10}{stats['p99_ms']:>10}")
+    gen = results["generation"]
+    print(
+        f"\nGeneration: {gen['completed']}/{gen['articles']} articles, "
+        f"{gen['articles_per_second']} articles/s, "
+        f"p50 ready {gen['p50_ready_ms']}ms, p99 ready {gen['p99_ready_ms']}ms"
+    )
+
+
+def compare_with_baseline(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressions beyond tolerance (a fraction, e.g. 0.25 for 25%)"""
+    regressions = []
+    old, new = baseline["mixed"], results["mixed"]
+    if new["throughput_rps"] < old["throughput_rps"] * (1 - tolerance):
+        regressions.append(f"throughput {old['throughput_rps']} -> {new['throughput_rps']} req/s")
+    for route, stats in new["routes"].items():
+        before = old["routes"].get(route)
+        if not before or min(stats["count"], before["count"]) < MIN_SAMPLES:
+            continue
+        for key in ("p50_ms", "p99_ms"):
+            # Ignore sub-millisecond noise on very fast routes
+            if stats[key] > before[key] * (1 + tolerance) and stats[key] - before[key] > 1.0:
+                regressions.append(f"{route} {key} {before[key]} -> {stats[key]}")
+    old_gen, new_gen = baseline["generation"], results["generation"]
+    if new_gen["articles_per_second"] < old_gen["articles_per_second"] * (1 - tolerance):
+        regressions.append(
+            f"generation {old_gen['articles_per_second']} -> {new_gen['articles_per_second']} articles/s"
+        )
+    return regressions
+
+
+async def run(args) -> dict:
+    from benchmarks.fake_tts_server import FakeTTSConfig, start_fake_tts_server
+
+    tts = await start_fake_tts_server(TTS_PORT, FakeTTSConfig(latency=args.tts_latency, jitter=args.tts_latency / 2))
+    server = ApiServer(args.mongodb_url)
+    await asyncio.to_thread(server.start)
+    base = f"http://127.0.0.1:{API_PORT}"
+    try:
+        mixed = await mixed_traffic(base, args)
+        generation = await generation_throughput(base, args)
+    finally:
+        await asyncio.to_thread(server.stop)
+        await tts.cleanup()
+
+    return {
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "users": args.users,
+            "articles": args.articles,
+            "tts_latency": args.tts_latency,
+            "mongo": "local" if args.mongodb_url else "in-memory",
+        },
+        "mixed": mixed,
+        "generation": generation,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--articles", type=int, default=150, help="Articles in the generation scenario")
+    parser.add_argument("--tts-latency", type=float, default=0.05, help="Fake TTS seconds per request")
+    parser.add_argument("--generation-timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--mongodb-url", help="Use a real MongoDB instead of the in-memory stand-in")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5)
+    parser.add_argument("--json", type=Path, help="Also write results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_report(results)
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2) + "\n")
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2) + "\n")
+        print(f"\nSaved baseline to {args.baseline}")
+        return
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())
+        if baseline["config"] != results["config"]:
+            print("\nBaseline was recorded with different settings, skipping comparison")
+            return
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print("\nREGRESSIONS vs baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("\nNo regressions vs baseline")
+
+
+if __name__ == "__main__":
+    main()
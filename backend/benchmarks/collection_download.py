@@ -0,0 +1,176 @@
+"""
+Throughput and server memory of streaming collection downloads
+
+Starts the API in a child process (in-memory MongoDB stand-in), fills a
+collection with articles whose audio files are written straight to the
+storage directory, then downloads the bundle several times at once and
+reports throughput and the server's resident memory while streaming. A
+last request resumes from the middle with Range and If-Range.
+
+Run from the backend directory:
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/collection_download.py --articles 50 --audio-mb 5 --clients 4
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+API_PORT = 8767
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ["LOCAL_STORAGE_PATH"] = tempfile.mkdtemp(prefix="readaloud-bench-")
+os.environ["TTS_HEALTH_CHECK_INTERVAL"] = "0"
+
+
+def run_server(articles: int, audio_bytes: int, ready):
+    import logging
+    from datetime import datetime
+    import uvicorn
+    from mongomock_motor import AsyncMongoMockClient
+    import main
+    from database import mongodb, get_collection
+    from tts_service import tts_service
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    async def serve():
+        mongodb.client = AsyncMongoMockClient()
+        config = uvicorn.Config(main.app, host="127.0.0.1", port=API_PORT, log_level="warning", lifespan="off")
+        server = uvicorn.Server(config)
+        task = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.05)
+
+        # Seed audio for the user the benchmark registers
+        while await get_collection("collections").find_one({}) is None:
+            await asyncio.sleep(0.05)
+        collection = await get_collection("collections").find_one({})
+        block = os.urandom(1 << 20)
+        for i in range(articles):
+            result = await get_collection("articles").insert_one({
+                "user_id": collection["user_id"],
+                "collection_id": collection["_id"],
+                "title": f"Article {i}",
+                "audio_url": "pending",
+                "duration_seconds": 300,
+                "created_at": datetime.utcnow(),
+            })
+            with open(tts_service.storage_path / f"{result.inserted_id}.wav", "wb") as f:
+                for offset in range(0, audio_bytes, len(block)):
+                    f.write(block[:audio_bytes - offset])
+        ready.set()
+        await task
+
+    asyncio.run(serve())
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def request(method: str, path: str, body: bytes = b"", headers: dict = None):
+    """Send a request and read the response head; the caller reads the body"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", API_PORT)
+    head = f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n"
+    head += "Content-Type: application/json\r\nConnection: close\r\n"
+    for name, value in (headers or {}).items():
+        head += f"{name}: {value}\r\n"
+    writer.write(head.encode() + b"\r\n" + body)
+    status_line, _, rest = (await reader.readuntil(b"\r\n\r\n")).partition(b"\r\n")
+    response_headers = dict(
+        line.decode().lower().split(": ", 1) for line in rest.strip().split(b"\r\n") if line
+    )
+    return int(status_line.split()[1]), response_headers, reader, writer
+
+
+async def fetch_json(method: str, path: str, body: bytes = b"", headers: dict = None):
+    _, _, reader, writer = await request(method, path, body, headers)
+    data = await reader.read()
+    writer.close()
+    return json.loads(data) if data else None
+
+
+async def download(path: str, headers: dict) -> tuple[int, dict, int]:
+    """Status, headers and number of body bytes, without keeping the body"""
+    status, response_headers, reader, writer = await request("GET", path, headers=headers)
+    received = 0
+    while chunk := await reader.read(1 << 20):
+        received += len(chunk)
+    writer.close()
+    return status, response_headers, received
+
+
+async def run(args, pid: int, ready):
+    for _ in range(100):
+        try:
+            await fetch_json("GET", "/")
+            break
+        except OSError:
+            await asyncio.sleep(0.1)
+    credentials = json.dumps({"email": "bench@example.com", "password": "benchmark"}).encode()
+    await fetch_json("POST", "/auth/register", credentials)
+    token = (await fetch_json("POST", "/auth/login", credentials))["access_token"]
+    auth = {"Authorization": f"Bearer {token}"}
+    await fetch_json("POST", "/collections", json.dumps({"name": "bench"}).encode(), auth)
+    await asyncio.to_thread(ready.wait)
+    collection_id = (await fetch_json("GET", "/collections", headers=auth))[0]["id"]
+    path = f"/collections/{collection_id}/download"
+
+    base = rss_mb(pid)
+    peak = base
+
+    async def sample():
+        nonlocal peak
+        while True:
+            peak = max(peak, rss_mb(pid))
+            await asyncio.sleep(0.05)
+
+    sampler = asyncio.create_task(sample())
+    started = time.perf_counter()
+    results = await asyncio.gather(*(download(path, auth) for _ in range(args.clients)))
+    elapsed = time.perf_counter() - started
+    sampler.cancel()
+
+    size = int(results[0][1]["content-length"])
+    total = sum(received for _, _, received in results)
+    print(f"{args.clients} downloads of {size / 1e6:.0f} MB ({args.articles} articles) in {elapsed:.1f}s, "
+          f"{total / 1e6 / elapsed:.0f} MB/s")
+    print(f"Server RSS: {base:.1f} MB before, {peak:.1f} MB peak while streaming")
+
+    status, headers, received = await download(
+        path, {**auth, "Range": f"bytes={size // 2}-", "If-Range": results[0][1]["etag"]}
+    )
+    print(f"Resume from the middle: {status}, {headers.get('content-range')}, {received} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--articles", type=int, default=50)
+    parser.add_argument("--audio-mb", type=float, default=5.0, help="Size of each article's audio file")
+    parser.add_argument("--clients", type=int, default=4, help="Concurrent downloads")
+    args = parser.parse_args()
+
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(
+        target=run_server, args=(args.articles, int(args.audio_mb * (1 << 20)), ready), daemon=True
+    )
+    server.start()
+    try:
+        asyncio.run(run(args, server.pid, ready))
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Memory and fan-out latency of idle push event streams
+
+Starts the API in a child process (in-memory MongoDB stand-in), opens
+many idle GET /events streams from this process, and reports the server's
+resident memory per connection. Then it publishes a library change to a
+user with every stream open and measures how long delivery takes.
+
+Run from the backend directory:
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/event_streams.py --connections 10000
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+API_PORT = 8766
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ["LOCAL_STORAGE_PATH"] = tempfile.mkdtemp(prefix="readaloud-bench-")
+os.environ["TTS_HEALTH_CHECK_INTERVAL"] = "0"
+
+
+def run_server():
+    import logging
+    import uvicorn
+    from mongomock_motor import AsyncMongoMockClient
+    import main
+    from database import mongodb
+    from events import broker
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    async def serve():
+        mongodb.client = AsyncMongoMockClient()
+        await broker.start()
+        config = uvicorn.Config(main.app, host="127.0.0.1", port=API_PORT, log_level="warning",
+                                lifespan="off", backlog=4096)
+        await uvicorn.Server(config).serve()
+
+    asyncio.run(serve())
+
+
+def rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+async def request(method: str, path: str, body: bytes = b"", token: str = None) -> tuple[int, bytes]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", API_PORT)
+    headers = f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n"
+    headers += "Content-Type: application/json\r\nConnection: close\r\n"
+    if token:
+        headers += f"Authorization: Bearer {token}\r\n"
+    writer.write(headers.encode() + b"\r\n" + body)
+    response = await reader.read()
+    writer.close()
+    status = int(response.split(b" ", 2)[1])
+    return status, response.split(b"\r\n\r\n", 1)[1]
+
+
+async def open_stream(token: str):
+    """Open an event stream and wait for its hello event"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", API_PORT)
+    writer.write(f"GET /events HTTP/1.1\r\nHost: localhost\r\nAuthorization: Bearer {token}\r\n\r\n".encode())
+    await reader.readuntil(b"event: hello")
+    await reader.readuntil(b"\n\n")
+    return reader, writer
+
+
+async def wait_for_server():
+    for _ in range(100):
+        try:
+            await request("GET", "/")
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError("API did not start")
+
+
+async def run(args, pid: int):
+    import json
+    await wait_for_server()
+    credentials = json.dumps({"email": "bench@example.com", "password": "benchmark"}).encode()
+    await request("POST", "/auth/register", credentials)
+    _, body = await request("POST", "/auth/login", credentials)
+    token = json.loads(body)["access_token"]
+
+    base = rss_mb(pid)
+    streams = []
+    started = time.perf_counter()
+    for offset in range(0, args.connections, 500):
+        batch = min(500, args.connections - offset)
+        streams += await asyncio.gather(*(open_stream(token) for _ in range(batch)))
+    opened = time.perf_counter() - started
+    await asyncio.sleep(1)
+    loaded = rss_mb(pid)
+
+    print(f"Opened {len(streams)} streams in {opened:.1f}s")
+    print(f"Server RSS: {base:.1f} MB idle, {loaded:.1f} MB with streams open, "
+          f"{(loaded - base) * 1024 / len(streams):.1f} KB per stream")
+
+    # One write fans out to every stream of the user
+    started = time.perf_counter()
+    await request("POST", "/collections", json.dumps({"name": "bench"}).encode(), token)
+    latencies = []
+
+    async def receive(reader):
+        await reader.readuntil(b"event: library_changed")
+        latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(receive(reader) for reader, _ in streams))
+    latencies.sort()
+    print(f"Fan-out to {len(latencies)} streams: p50 {latencies[len(latencies) // 2] * 1000:.0f} ms, "
+          f"last {latencies[-1] * 1000:.0f} ms")
+
+    for _, writer in streams:
+        writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=2000)
+    args = parser.parse_args()
+
+    server = multiprocessing.Process(target=run_server, daemon=True)
+    server.start()
+    try:
+        asyncio.run(run(args, server.pid))
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
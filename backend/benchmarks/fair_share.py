@@ -0,0 +1,102 @@
+"""
+Fair-share benchmark for audio generation
+
+One user bulk-saves many articles; while their import is queued, a few
+other users each save a single article. Reports how long the single saves
+wait for audio compared with the bulk import, which under first come,
+first served would be behind every bulk article.
+
+Run from the backend directory:
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/fair_share.py --bulk 150 --interactive 5
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("GENERATION_CONCURRENCY", "8")
+
+from benchmarks.api_load import (  # noqa: E402
+    API_PORT, TTS_PORT, ApiServer, Recorder, VirtualUser, create_article, login, percentile
+)
+import aiohttp  # noqa: E402
+
+
+async def new_user(session, base: str, recorder: Recorder, name: str) -> VirtualUser:
+    user = VirtualUser(f"{name}-{random.randrange(1 << 30)}@example.com")
+    await recorder.call(session, "register", "POST", f"{base}/auth/register",
+                        json={"email": user.email, "password": user.password})
+    await login(session, base, recorder, user)
+    collection = await recorder.call(session, "create_collection", "POST", f"{base}/collections",
+                                     json={"name": name}, headers=user.headers)
+    user.collection_ids.append(collection["id"])
+    return user
+
+
+async def wait_for_audio(session, base: str, recorder: Recorder, user: VirtualUser, started: float,
+                         timeout: float) -> list[float]:
+    """Seconds from started until each of the user's articles had audio"""
+    pending = set(user.article_ids)
+    ready_at = []
+    while pending and time.perf_counter() - started < timeout:
+        await asyncio.sleep(0.1)
+        listing = await recorder.call(session, "poll", "GET", f"{base}/articles?limit={len(user.article_ids)}",
+                                      headers=user.headers)
+        for article in listing or []:
+            if article["id"] in pending and article["audio_url"]:
+                pending.discard(article["id"])
+                ready_at.append(time.perf_counter() - started)
+    return ready_at
+
+
+async def run(args):
+    from benchmarks.fake_tts_server import FakeTTSConfig, start_fake_tts_server
+
+    tts = await start_fake_tts_server(TTS_PORT, FakeTTSConfig(latency=args.tts_latency, jitter=args.tts_latency / 2))
+    server = ApiServer()
+    await asyncio.to_thread(server.start)
+    base = f"http://127.0.0.1:{API_PORT}"
+    rng = random.Random(args.seed)
+    recorder = Recorder()
+    try:
+        async with aiohttp.ClientSession() as session:
+            bulk = await new_user(session, base, recorder, "bulk")
+            others = [await new_user(session, base, recorder, f"reader{i}") for i in range(args.interactive)]
+
+            started = time.perf_counter()
+            await asyncio.gather(*(create_article(session, base, recorder, bulk, rng) for _ in range(args.bulk)))
+            saved = time.perf_counter()
+            # Everyone else saves one article each once the import is queued
+            await asyncio.gather(*(create_article(session, base, recorder, user, rng) for user in others))
+            interactive = await asyncio.gather(*(
+                wait_for_audio(session, base, recorder, user, saved, args.timeout) for user in others
+            ))
+            bulk_ready = await wait_for_audio(session, base, recorder, bulk, started, args.timeout)
+    finally:
+        await asyncio.to_thread(server.stop)
+        await tts.cleanup()
+
+    waits = [ready for user_ready in interactive for ready in user_ready]
+    print(f"Bulk import: {len(bulk_ready)}/{args.bulk} articles, all ready after {max(bulk_ready, default=0):.1f}s")
+    print(f"Single saves: {len(waits)}/{args.interactive} ready, "
+          f"p50 {percentile(waits, 50):.2f}s, max {max(waits, default=0):.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bulk", type=int, default=150, help="Articles saved by the bulk user")
+    parser.add_argument("--interactive", type=int, default=5, help="Other users saving one article each")
+    parser.add_argument("--tts-latency", type=float, default=0.05, help="Fake TTS seconds per request")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Fake TTS server with injectable latency and failures
+
+Speaks the same /synthesize and /health API as the real TTS server and
+returns a short silent WAV, so the API can be exercised without a GPU.
+
+Run standalone:
+    python benchmarks/fake_tts_server.py --port 5000 --latency 0.2 --slow-rate 0.05 --slow-latency 3
+"""
+import argparse
+import asyncio
+import io
+import random
+import wave
+from dataclasses import dataclass
+from typing import Optional
+from aiohttp import web
+
+
+@dataclass
+class FakeTTSConfig:
+    latency: float = 0.05  # Base seconds per request
+    jitter: float = 0.0  # Uniform extra latency, 0..jitter seconds
+    slow_rate: float = 0.0  # Fraction of requests that take slow_latency instead
+    slow_latency: float = 2.0
+    error_rate: float = 0.0  # Fraction of requests answered with HTTP 500
+    voices: Optional[tuple] = None  # When set, other voices are answered with HTTP 400
+    healthy: bool = True
+
+
+def silent_wav(seconds: float, sample_rate: int = 8000) -> bytes:
+    """A mono 16-bit WAV of silence"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(b"\x00\x00" * int(seconds * sample_rate))
+    return buffer.getvalue()
+
+
+def create_app(config: FakeTTSConfig) -> web.Application:
+    app = web.Application()
+    app["config"] = config
+    app["requests"] = 0
+
+    async def synthesize(request: web.Request) -> web.Response:
+        body = await request.json()
+        app["requests"] += 1
+
+        if config.voices is not None and body.get("voice") not in config.voices:
+            return web.Response(status=400, text=f"Unknown voice: {body.get('voice')}")
+
+        if random.random() < config.slow_rate:
+            delay = config.slow_latency
+        else:
+            delay = config.latency + random.uniform(0, config.jitter)
+        await asyncio.sleep(delay)
+
+        if random.random() < config.error_rate:
+            return web.Response(status=500, text="injected failure")
+
+        # Roughly 150 words per minute of speech
+        words = len(body.get("text", "").split())
+        seconds = max(words / 2.5 / body.get("rate", 1.0), 0.1)
+        return web.Response(body=silent_wav(seconds), content_type="audio/wav")
+
+    async def health(request: web.Request) -> web.Response:
+        if not config.healthy:
+            return web.Response(status=503)
+        return web.json_response({"status": "ok"})
+
+    app.router.add_post("/synthesize", synthesize)
+    app.router.add_get("/health", health)
+    return app
+
+
+async def start_fake_tts_server(port: int, config: FakeTTSConfig = None) -> web.AppRunner:
+    """Start a fake TTS server in the running event loop; call runner.cleanup() to stop"""
+    runner = web.AppRunner(create_app(config or FakeTTSConfig()))
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0)
+    parser.add_argument("--slow-latency", type=float, default=2.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    web.run_app(
+        create_app(FakeTTSConfig(
+            latency=args.latency,
+            jitter=args.jitter,
+            slow_rate=args.slow_rate,
+            slow_latency=args.slow_latency,
+            error_rate=args.error_rate,
+        )),
+        host="127.0.0.1",
+        port=args.port,
+    )
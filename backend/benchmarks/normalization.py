@@ -0,0 +1,81 @@
+"""
+Throughput of the text normalization stage on large inputs
+
+Builds synthetic scraped articles (prose mixed with URLs, footnotes,
+navigation lines and code blocks) of increasing size, plus pathological
+inputs with no line breaks, and reports MB/s and how much text each
+one loses.
+
+Run from the backend directory:
+    python benchmarks/normalization.py
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from text_normalization import normalize_text  # noqa: E402
+
+PROSE = (
+    "Dr. Jones said the results were approx. 40% better than last year, e.g. in cities like Paris & Rome. "
+    "The team, i.e. the engineers, shipped it on Oct. 3 [12]. Read the paper at https://example.org/paper?id=42. "
+    "It wasn't easy, but it worked.¹ Contact press@example.org for details etc. "
+)
+NAVIGATION = ["Skip to content", "Menu", "Share this article", "Advertisement", "Related articles", "12 comments"]
+CODE = "```js\nconst total = items.reduce((a, b) => a + b, 0);\nconsole.log(total);\n```\n"
+
+
+def scraped_article(size: int, rng: random.Random) -> str:
+    parts = []
+    length = 0
+    while length < size:
+        roll = rng.random()
+        if roll < 0.1:
+            part = rng.choice(NAVIGATION) + "\n"
+        elif roll < 0.15:
+            part = CODE
+        else:
+            part = PROSE * rng.randint(1, 4) + "\n\n"
+        parts.append(part)
+        length += len(part)
+    return "".join(parts)[:size]
+
+
+def measure(name: str, text: str, repeat: int):
+    normalize_text(text)  # Warm up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = normalize_text(text)
+    elapsed = (time.perf_counter() - started) / repeat
+    mb = len(text) / 1_000_000
+    print(
+        f"{name:<32} {mb:8.2f} MB  {elapsed * 1000:9.1f} ms  {mb / elapsed:7.1f} MB/s  "
+        f"removed {result.removed_chars / max(len(text), 1):6.1%}  chunks {len(result.chunks)}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-mb", type=float, default=10.0)
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    size = 10_000
+    while size <= args.max_mb * 1_000_000:
+        measure(f"scraped article", scraped_article(size, rng), args.repeat)
+        size *= 10
+
+    # Inputs that make naive regexes backtrack: one huge line, long symbol runs
+    one_mb = 1_000_000
+    measure("single line, no breaks", PROSE.replace("\n", " ") * (one_mb // len(PROSE)), args.repeat)
+    measure("dotted run (a.a.a...)", "a." * (one_mb // 2), args.repeat)
+    measure("whitespace run", " " * one_mb, args.repeat)
+    measure("assignments without ;", "x = 1 " * (one_mb // 6), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
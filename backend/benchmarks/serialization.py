@@ -0,0 +1,135 @@
+"""
+Per-document serialization cost for article and collection listings
+
+Compares the old path (build a response model per document, then let
+FastAPI validate and re-serialize the list) with the fast path in
+serialization.py (one conversion pass, encoded with orjson), and checks
+that both produce the same JSON.
+
+Run from the backend directory:
+    python benchmarks/serialization.py --docs 1000
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from bson import ObjectId  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from models import ArticleResponse, CollectionResponse  # noqa: E402
+from serialization import article_to_dict, collection_to_dict, json_response  # noqa: E402
+
+
+def make_articles(count: int) -> list[dict]:
+    user_id, collection_id = ObjectId(), ObjectId()
+    now = datetime.utcnow().replace(microsecond=123000)
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": user_id,
+            "title": f"Article {i}",
+            "content": "Some article text to be read aloud. " * 100,
+            "source_url": f"https://example.com/{i}",
+            "audio_url": f"/audio/{i}.wav" if i % 2 else None,
+            "duration_seconds": 300 if i % 2 else None,
+            "play_position_seconds": i,
+            "created_at": now - timedelta(minutes=i),
+            "last_played_at": now if i % 3 else None,
+            "collection_id": collection_id,
+        }
+        for i in range(count)
+    ]
+
+
+def make_collections(count: int) -> list[dict]:
+    user_id = ObjectId()
+    now = datetime.utcnow()
+    return [
+        {"_id": ObjectId(), "user_id": user_id, "name": f"Collection {i}", "description": None, "created_at": now}
+        for i in range(count)
+    ]
+
+
+def old_articles(docs: list[dict]) -> bytes:
+    models = [
+        ArticleResponse(
+            id=str(doc["_id"]),
+            user_id=str(doc["user_id"]),
+            title=doc["title"],
+            content=doc["content"],
+            source_url=doc.get("source_url"),
+            audio_url=doc.get("audio_url"),
+            duration_seconds=doc.get("duration_seconds"),
+            play_position_seconds=doc.get("play_position_seconds", 0),
+            created_at=doc["created_at"],
+            last_played_at=doc.get("last_played_at"),
+            collection_id=str(doc["collection_id"]) if doc.get("collection_id") else None
+        )
+        for doc in docs
+    ]
+    return serialize_like_fastapi(List[ArticleResponse], models)
+
+
+def old_collections(docs: list[dict]) -> bytes:
+    models = [
+        CollectionResponse(
+            id=str(doc["_id"]),
+            user_id=str(doc["user_id"]),
+            name=doc["name"],
+            description=doc.get("description"),
+            article_count=5,
+            created_at=doc["created_at"]
+        )
+        for doc in docs
+    ]
+    return serialize_like_fastapi(List[CollectionResponse], models)
+
+
+def serialize_like_fastapi(response_type, content) -> bytes:
+    """What FastAPI does with a response_model: dump, validate, serialize, json.dumps"""
+    adapter = TypeAdapter(response_type)
+    validated = adapter.validate_python(adapter.dump_python(content))
+    encoded = adapter.dump_python(validated, mode="json")
+    return json.dumps(encoded, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+def fast_articles(docs: list[dict]) -> bytes:
+    return json_response([article_to_dict(doc) for doc in docs]).body
+
+
+def fast_collections(docs: list[dict]) -> bytes:
+    return json_response([collection_to_dict(doc, 5) for doc in docs]).body
+
+
+def per_doc_us(fn, docs, repeat: int) -> float:
+    fn(docs)  # Warm up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn(docs)
+    return (time.perf_counter() - started) / (repeat * len(docs)) * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for name, docs, old, fast in (
+        ("articles", make_articles(args.docs), old_articles, fast_articles),
+        ("collections", make_collections(args.docs), old_collections, fast_collections),
+    ):
+        assert json.loads(old(docs)) == json.loads(fast(docs)), f"{name}: fast path output differs"
+        before = per_doc_us(old, docs, args.repeat)
+        after = per_doc_us(fast, docs, args.repeat)
+        print(f"{name:<12} before {before:8.2f} us/doc   after {after:6.2f} us/doc   {before / after:5.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
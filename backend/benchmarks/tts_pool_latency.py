@@ -0,0 +1,88 @@
+"""
+Tail latency of TTS chunk synthesis across a backend pool
+
+Starts local fake TTS servers with injected latency and failures and
+drives chunk-sized requests through TTSBackendPool, reporting p50/p99
+for a single server, a pool, a pool with hedging and a pool with a dead
+backend.
+
+Run from the backend directory:
+    python benchmarks/tts_pool_latency.py --requests 400 --concurrency 8
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from config import settings  # noqa: E402
+from tts_pool import TTSBackendPool  # noqa: E402
+from benchmarks.fake_tts_server import FakeTTSConfig, start_fake_tts_server  # noqa: E402
+
+BASE_PORT = 5900
+
+FAST = FakeTTSConfig(latency=0.05, jitter=0.02)
+FLAKY_TAIL = FakeTTSConfig(latency=0.05, jitter=0.02, slow_rate=0.1, slow_latency=1.5)
+DEAD = FakeTTSConfig(latency=0.01, error_rate=1.0, healthy=False)
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_scenario(name: str, configs: list[FakeTTSConfig], hedge_after, requests: int, concurrency: int):
+    runners = [await start_fake_tts_server(BASE_PORT + i, c) for i, c in enumerate(configs)]
+    settings.tts_hedge_after_seconds = hedge_after
+    pool = TTSBackendPool([f"http://127.0.0.1:{BASE_PORT + i}" for i in range(len(configs))])
+
+    latencies = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await pool.synthesize({"text": f"chunk number {i} " * 10, "rate": 1.0}, hedge=True)
+            except Exception:
+                errors += 1
+                return
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    await pool.close()
+    for runner in runners:
+        await runner.cleanup()
+
+    print(
+        f"{name:<28} ok={len(latencies):<5} errors={errors:<4} "
+        f"p50={percentile(latencies, 50) * 1000:7.1f}ms "
+        f"p99={percentile(latencies, 99) * 1000:7.1f}ms "
+        f"throughput={len(latencies) / elapsed:6.1f}/s"
+    )
+
+
+async def main(args):
+    settings.tts_circuit_failure_threshold = 3
+    settings.tts_circuit_reset_seconds = 30.0
+    await run_scenario("single server (tail)", [FLAKY_TAIL], None, args.requests, args.concurrency)
+    await run_scenario("pool of 3 (tail)", [FLAKY_TAIL] * 3, None, args.requests, args.concurrency)
+    await run_scenario("pool of 3 (tail) + hedge", [FLAKY_TAIL] * 3, args.hedge_after, args.requests, args.concurrency)
+    await run_scenario("pool with dead backend", [FAST, FAST, DEAD], None, args.requests, args.concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--hedge-after", type=float, default=0.2)
+    asyncio.run(main(parser.parse_args()))
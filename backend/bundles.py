@@ -0,0 +1,264 @@
+"""
+Offline bundles - a collection's audio and a JSON manifest in one tar stream
+
+The archive is laid out from file sizes alone before a byte is sent: tar
+headers and the manifest are built in memory (a few hundred bytes per
+article), and audio is streamed straight from storage in chunks. So the
+response has a Content-Length, nothing is written to temporary files, and
+any byte range can be served, which lets a client resume an interrupted
+download with Range and If-Range.
+
+Audio is stored uncompressed, so tar rather than zip: zip headers carry
+a CRC of each file, which would mean reading every file before sending
+the first byte of a resumed range.
+
+Audio goes out through the ASGI zero-copy extension (the server calls
+sendfile) when the server offers it, and otherwise as os.pread chunks read
+in a worker thread.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import tarfile
+from dataclasses import dataclass
+from functools import partial
+from typing import Optional, Union
+import anyio
+import orjson
+from fastapi import HTTPException, status
+from fastapi.responses import Response
+from config import settings
+from database import get_collection
+from tts_service import tts_service
+from metrics import collection_downloads_total, collection_download_bytes_total
+import logging
+
+logger = logging.getLogger(__name__)
+
+BLOCK = tarfile.BLOCKSIZE
+_ZEROS = bytes(2 * BLOCK)
+# Fields shown in the manifest - never the article content
+BUNDLE_ITEM_PROJECTION = {"title": 1, "source_url": 1, "duration_seconds": 1, "created_at": 1}
+
+
+@dataclass
+class AudioMember:
+    path: str
+    size: int
+    inode: int
+
+
+Segment = Union[bytes, AudioMember]
+
+
+@dataclass
+class Bundle:
+    segments: list[tuple[int, Segment]]  # (archive offset, contents) in order
+    size: int
+    etag: str
+    filename: str
+
+
+def _tar_header(name: str, size: int, mtime: int) -> bytes:
+    info = tarfile.TarInfo(name)
+    info.size = size
+    info.mtime = mtime
+    info.mode = 0o644
+    return info.tobuf(tarfile.USTAR_FORMAT, "utf-8", "strict")
+
+
+def _slug(name: str, fallback: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "-", name or "").strip("-.")[:60]
+    return slug or fallback
+
+
+def _stat_audio(paths: list[str]) -> list[Optional[os.stat_result]]:
+    results = []
+    for path in paths:
+        try:
+            results.append(os.stat(path))
+        except OSError:
+            results.append(None)
+    return results
+
+
+async def build_bundle(collection: dict) -> Bundle:
+    """Lay out the archive for a collection's articles with generated audio"""
+    articles = get_collection("articles")
+    cursor = articles.find(
+        {"collection_id": collection["_id"], "user_id": collection["user_id"], "audio_url": {"$ne": None}},
+        BUNDLE_ITEM_PROJECTION
+    ).sort("created_at", -1)
+    docs = [doc async for doc in cursor]
+    paths = [str(tts_service.storage_path / f"{doc['_id']}.wav") for doc in docs]
+    stats = await asyncio.to_thread(_stat_audio, paths)
+
+    folder = _slug(collection.get("name"), str(collection["_id"]))
+    items, members = [], []
+    start = 0
+    for doc, path, stat in zip(docs, paths, stats):
+        if stat is None:
+            continue  # The storage reconciler will queue it for regeneration
+        name = f"audio/{len(items) + 1:04d}-{doc['_id']}.wav"
+        duration = doc.get("duration_seconds") or 0
+        items.append({
+            "id": str(doc["_id"]),
+            "title": doc.get("title"),
+            "source_url": doc.get("source_url"),
+            "file": name,
+            "size_bytes": stat.st_size,
+            "duration_seconds": duration,
+            "start_seconds": start,  # Offset of this article when the bundle is played in order
+            "created_at": doc["created_at"].isoformat() if doc.get("created_at") else None,
+        })
+        members.append((name, AudioMember(path, stat.st_size, stat.st_ino), int(stat.st_mtime)))
+        start += duration
+
+    manifest = orjson.dumps({
+        "collection": {
+            "id": str(collection["_id"]),
+            "name": collection.get("name"),
+            "description": collection.get("description"),
+        },
+        "total_duration_seconds": start,
+        "articles": items,
+    }, option=orjson.OPT_INDENT_2)
+    manifest_mtime = max((mtime for _, _, mtime in members), default=int(collection["created_at"].timestamp()))
+
+    segments: list[tuple[int, Segment]] = []
+    offset = 0
+
+    def add(contents: Segment, length: int):
+        nonlocal offset
+        segments.append((offset, contents))
+        offset += length
+
+    def add_member(name: str, contents: Segment, size: int, mtime: int):
+        add(_tar_header(f"{folder}/{name}", size, mtime), BLOCK)
+        add(contents, size)
+        if size % BLOCK:
+            add(_ZEROS[:BLOCK - size % BLOCK], BLOCK - size % BLOCK)
+
+    add_member("manifest.json", manifest, len(manifest), manifest_mtime)
+    for name, member, mtime in members:
+        add_member(name, member, member.size, mtime)
+    add(_ZEROS, len(_ZEROS))  # End of archive
+
+    # Any change to the manifest or to a file's identity changes the bytes, so resumes must restart
+    digest = hashlib.sha1(manifest)
+    for _, member, mtime in members:
+        digest.update(f"{member.inode}:{member.size}:{mtime}".encode("ascii"))
+    return Bundle(segments, offset, f'"{digest.hexdigest()[:20]}"', f"{folder}.tar")
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """
+    The single byte range requested as (start, stop), stop exclusive, or None
+    to send everything. Multiple ranges are answered with the whole archive.
+    """
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    first, _, last = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            if last and int(last) < start:
+                return None  # Invalid rather than unsatisfiable, so ignored (RFC 9110)
+            stop = min(int(last) + 1, size) if last else size
+        else:
+            start, stop = max(size - int(last), 0), size  # Suffix range: the last N bytes
+    except ValueError:
+        return None
+    if start >= size or start >= stop:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, stop
+
+
+class BundleResponse(Response):
+    """Streams the requested range of a bundle, reading audio only as it is sent"""
+
+    media_type = "application/x-tar"
+
+    def __init__(self, bundle: Bundle, byte_range: Optional[tuple[int, int]]):
+        self.bundle = bundle
+        self.start, self.stop = byte_range or (0, bundle.size)
+        self.status_code = status.HTTP_206_PARTIAL_CONTENT if byte_range else status.HTTP_200_OK
+        self.background = None
+        headers = {
+            "Content-Length": str(self.stop - self.start),
+            "Content-Disposition": f'attachment; filename="{bundle.filename}"',
+            "Accept-Ranges": "bytes",
+            "ETag": bundle.etag,
+            "Cache-Control": "private, no-cache",
+        }
+        if byte_range:
+            headers["Content-Range"] = f"bytes {self.start}-{self.stop - 1}/{bundle.size}"
+        self.init_headers(headers)
+
+    async def __call__(self, scope, receive, send):
+        zerocopy = "http.response.zerocopy" in scope.get("extensions", {})
+        kind = "partial" if self.status_code == status.HTTP_206_PARTIAL_CONTENT else "full"
+        collection_downloads_total.labels(kind).inc()
+
+        # Like StreamingResponse: stop reading files as soon as the client goes away
+        async with anyio.create_task_group() as task_group:
+            async def wrap(func):
+                await func()
+                task_group.cancel_scope.cancel()
+
+            task_group.start_soon(wrap, partial(self._stream, send, zerocopy))
+            await wrap(partial(self._listen_for_disconnect, receive))
+
+    async def _listen_for_disconnect(self, receive):
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+
+    async def _stream(self, send, zerocopy: bool):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        for offset, contents in self.bundle.segments:
+            length = contents.size if isinstance(contents, AudioMember) else len(contents)
+            if offset + length <= self.start:
+                continue
+            if offset >= self.stop:
+                break
+            begin = max(self.start - offset, 0)
+            end = min(self.stop - offset, length)
+            if isinstance(contents, AudioMember):
+                await self._send_audio(send, contents, begin, end, zerocopy)
+            else:
+                await send({"type": "http.response.body", "body": contents[begin:end], "more_body": True})
+            collection_download_bytes_total.inc(end - begin)
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    async def _send_audio(self, send, member: AudioMember, begin: int, end: int, zerocopy: bool):
+        with open(member.path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            if stat.st_ino != member.inode or stat.st_size != member.size:
+                # Regenerated mid-download; the ETag changes too, so the client's
+                # If-Range resume will get the new archive from the start
+                raise RuntimeError(f"Audio file {member.path} changed while being downloaded")
+            if zerocopy:
+                await send({
+                    "type": "http.response.zerocopy",
+                    "file": file,
+                    "offset": begin,
+                    "count": end - begin,
+                    "more_body": True,
+                })
+                return
+            position = begin
+            while position < end:
+                chunk = await asyncio.to_thread(
+                    os.pread, file.fileno(), min(settings.download_chunk_bytes, end - position), position
+                )
+                if not chunk:
+                    raise RuntimeError(f"Audio file {member.path} was truncated while being downloaded")
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+                position += len(chunk)
+
@@ -17,6 +17,16 @@ class Settings(BaseSettings):
     
     # TTS
     tts_server_url: str = "http://localhost:5000"
+    tts_server_urls: Optional[str] = None  # Comma-separated pool, overrides tts_server_url
+    tts_request_timeout: float = 300.0
+    tts_health_check_interval: float = 10.0  # 0 disables background probes
+    tts_health_check_timeout: float = 2.0
+    tts_circuit_failure_threshold: int = 3
+    tts_circuit_reset_seconds: float = 30.0
+    tts_hedge_after_seconds: Optional[float] = None  # Hedge slow chunks on a second backend
+    tts_chunk_cache_mb: int = 64  # In-memory LRU cache for synthesized chunks
+    tts_prefetch_chunks: int = 2  # Upcoming chunks synthesized ahead of playback (and the most a request may send)
+    tts_chunk_max_chars: int = 2000  # Longest text POST /tts/chunk accepts per chunk
     
     # Storage
     storage_type: str = "local"  # 'local' or 's3'
@@ -31,6 +41,67 @@ class Settings(BaseSettings):
     # Server
     host: str = "0.0.0.0"
     port: int = 8000
+    workers: int = 1  # Worker processes started by serve.py
+    forwarded_allow_ips: str = "127.0.0.1"  # Proxies whose X-Forwarded-For/-Proto serve.py trusts, comma separated
+    
+    # Audio generation
+    lease_ttl_seconds: float = 60.0  # Leases are renewed every third of this
+    generation_recovery_interval: float = 60.0
+    generation_recovery_grace_seconds: float = 300.0  # Age before a pending article counts as stalled
+    generation_recovery_batch: int = 20
+    generation_max_attempts: int = 3
+    generation_chunk_concurrency: int = 2  # Chunks of one article synthesized at once
+    generation_lease_retry_seconds: float = 5.0  # Wait before retrying content someone else is generating
+    normalization_chunk_chars: int = 500
+    generation_concurrency: int = 32  # Articles synthesized at once per process
+    generation_user_concurrency: int = 4  # ...of which one user gets at most this many while others wait
+    generation_user_max_queued: int = 500  # Articles one user may have waiting before saves get 429
+    generation_quantum_chars: int = 20000  # Characters each user's turn is worth in the fair-share queue
+    generation_daily_quota_chars: int = 0  # Characters one user may queue per UTC day, 0 for unlimited
+    
+    # Storage reconciliation
+    storage_gc_interval: float = 3600.0  # 0 disables the background reconciler
+    storage_gc_grace_seconds: float = 3600.0  # Younger files are never deleted
+    storage_gc_batch: int = 1000  # Files or articles checked per batch
+    download_chunk_bytes: int = 262144  # Audio read per chunk when streaming collection downloads
+    
+    # Push events
+    event_bus: str = "local"  # 'local' (one process) or 'mongo' (shared by all workers and hosts)
+    event_bus_bytes: int = 16 * 1024 * 1024  # Size of the capped collection behind the mongo bus
+    events_max_connections: int = 10000  # Open event streams per process
+    events_ticket_seconds: int = 60  # Lifetime of the ?ticket= for opening an event stream
+    events_resume_seconds: int = 86400  # How long after (re)connecting a dropped stream may reconnect by itself
+    events_max_pending: int = 100  # Undelivered events per stream before it is told to resync
+    events_keepalive_seconds: float = 25.0
+    events_retry_ms: int = 5000  # Reconnect delay suggested to clients
+    graceful_shutdown_seconds: float = 10.0  # serve.py closes open streams after this on shutdown
+    
+    # Podcast feeds
+    public_base_url: Optional[str] = None  # Absolute URL for feed links, defaults to the request's
+    feed_cache_entries: int = 500
+    feed_revalidate_seconds: float = 30.0  # How stale another worker's write can leave a cached feed
+    feed_max_items: int = 200
+    
+    # Metrics
+    metrics_storage_scan_interval: float = 60.0  # Seconds between storage usage scans
+    
+    # Readiness
+    readiness_cache_seconds: float = 5.0
+    readiness_check_timeout: float = 2.0
+    readiness_min_free_mb: int = 500
+    
+    # Load shedding
+    max_generation_backlog: int = 200  # Queued + running audio generation jobs
+    max_event_loop_lag_ms: float = 200.0
+    loop_lag_check_interval: float = 0.5
+    shed_retry_after_seconds: int = 30
+    
+    @property
+    def tts_backend_urls(self) -> list[str]:
+        """TTS servers to route synthesis across"""
+        if self.tts_server_urls:
+            return [url.strip() for url in self.tts_server_urls.split(",") if url.strip()]
+        return [self.tts_server_url]
     
     class Config:
         env_file = ".env"
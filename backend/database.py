@@ -3,6 +3,7 @@ MongoDB database connection and utilities
 """
 from motor.motor_asyncio import AsyncIOMotorClient
 from config import settings
+from metrics import MongoCommandMetrics
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,7 +19,10 @@ mongodb = MongoDB()
 async def connect_to_mongo():
     """Connect to MongoDB"""
     logger.info("Connecting to MongoDB...")
-    mongodb.client = AsyncIOMotorClient(settings.mongodb_url)
+    mongodb.client = AsyncIOMotorClient(
+        settings.mongodb_url,
+        event_listeners=[MongoCommandMetrics()]
+    )
     logger.info("Connected to MongoDB!")
 
 
@@ -29,6 +33,20 @@ async def close_mongo_connection():
     logger.info("MongoDB connection closed!")
 
 
+async def ensure_indexes():
+    """Create indexes used by generation and lease queries"""
+    db = get_database()
+    try:
+        await db["articles"].create_index("content_hash")
+        await db["articles"].create_index([("audio_url", 1), ("created_at", 1)])
+        await db["articles"].create_index([("collection_id", 1), ("created_at", -1)])  # Collection feeds
+        # Expired leases are taken over by acquire_lease; the TTL index only tidies up
+        await db["leases"].create_index("expires_at", expireAfterSeconds=3600)
+        await db["generation_usage"].create_index("expires_at", expireAfterSeconds=86400)  # Daily quotas
+    except Exception as e:
+        logger.error(f"Failed to create indexes: {e}")
+
+
 def get_database():
     """Get database instance"""
     return mongodb.client[settings.database_name]
@@ -0,0 +1,70 @@
+"""
+Conditional GETs for library responses
+
+Every user carries a library_version counter, bumped after each article or
+collection write. Library responses get an ETag derived from that version
+and the request URL. The user document is already loaded to authenticate
+the request, so a matching If-None-Match is answered with a 304 before any
+library query runs.
+"""
+import hashlib
+from typing import Optional
+from bson import ObjectId
+from pymongo import ReturnDocument
+from fastapi import Depends, HTTPException, Request, status
+from auth import get_current_user
+from database import get_collection
+from events import broker
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header matches etag (weak comparison)"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+def etag_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+async def library_etag(request: Request, user=Depends(get_current_user)) -> str:
+    """
+    Dependency giving the ETag of a library response. Raises a 304 when the
+    client already has it, so the route never runs its queries.
+    """
+    url = request.url.path + ("?" + request.url.query if request.url.query else "")
+    version = user.get("library_version", 0)
+    digest = hashlib.sha1(f"{user['_id']}:{version}:{url}".encode("utf-8")).hexdigest()[:20]
+    etag = f'"{digest}"'
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers=etag_headers(etag)
+        )
+    return etag
+
+
+async def bump_library_version(user_id, event: str = "library_changed", data: Optional[dict] = None):
+    """
+    Call after every article or collection write, once the write has landed.
+    Open clients are sent event with data and the new library_version.
+    """
+    try:
+        user = await get_collection("users").find_one_and_update(
+            {"_id": ObjectId(user_id)},
+            {"$inc": {"library_version": 1}},
+            projection={"library_version": 1},
+            return_document=ReturnDocument.AFTER
+        )
+    except Exception as e:
+        # Clients may be told their copy is current until the next write
+        logger.error(f"Failed to bump library version of user {user_id}: {e}")
+        return
+    if user is not None:
+        # Open clients refetch now instead of on their next poll
+        await broker.publish(user_id, event, {**(data or {}), "library_version": user["library_version"]})
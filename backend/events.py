@@ -0,0 +1,247 @@
+"""
+Per-user push events over Server-Sent Events
+
+Clients keep one GET /events stream open and are told when audio is
+ready, how far a generation job has got, and when their library changed
+(so they refetch with If-None-Match instead of polling).
+
+One broker per process fans every event out to that user's local streams.
+With EVENT_BUS=mongo (set by serve.py when it runs several workers) events
+go through a capped MongoDB collection that each process tails with a single
+cursor, so a job finishing on one worker reaches streams held by any other.
+
+An idle stream costs one suspended coroutine waiting for the client to
+disconnect plus a small subscriber object. Nothing runs per connection
+until there is something to send; keepalives come from one shared loop.
+"""
+import asyncio
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+from fastapi.responses import Response
+import orjson
+from config import settings
+from database import get_database
+from metrics import event_streams_open, events_published_total, events_dropped_total
+import logging
+
+logger = logging.getLogger(__name__)
+
+KEEPALIVE = b": keepalive\n\n"
+EVENT_BUS_SKEW_SECONDS = 5
+# Sent instead of events a slow client missed: refetch everything
+RESYNC_EVENT = "resync"
+
+
+def format_event(event_type: str, data: dict, event_id: Optional[str] = None) -> bytes:
+    head = b"id: " + event_id.encode("ascii") + b"\n" if event_id else b""
+    return head + b"event: " + event_type.encode("ascii") + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+class Subscriber:
+    """One open event stream. Writes are flushed by a short-lived task only when there's data."""
+
+    __slots__ = ("user_id", "send", "pending", "flushing", "closed")
+
+    def __init__(self, user_id: str, send):
+        self.user_id = user_id
+        self.send = send
+        self.pending: list[bytes] = []  # A list, not a deque: idle streams are the common case
+        self.flushing = False
+        self.closed = False
+
+
+class EventBroker:
+    def __init__(self):
+        self._subscribers: dict[str, set[Subscriber]] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self._background: list[asyncio.Task] = []
+        self.connections = 0
+
+    # Connections
+
+    def subscribe(self, user_id: str, send, held: bool = False) -> Subscriber:
+        """With held=True events are queued, not sent, until release()"""
+        subscriber = Subscriber(user_id, send)
+        subscriber.flushing = held  # Nothing starts a flush while this is set
+        self._subscribers.setdefault(user_id, set()).add(subscriber)
+        self.connections += 1
+        event_streams_open.inc()
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        subscriber.closed = True
+        subscribers = self._subscribers.get(subscriber.user_id)
+        if subscribers is not None and subscriber in subscribers:
+            subscribers.discard(subscriber)
+            if not subscribers:
+                del self._subscribers[subscriber.user_id]
+            self.connections -= 1
+            event_streams_open.dec()
+
+    def release(self, subscriber: Subscriber):
+        """Start sending a held subscriber's events, including any queued meanwhile"""
+        subscriber.flushing = False
+        if subscriber.pending:
+            self._start_flush(subscriber)
+
+    def _push(self, subscriber: Subscriber, message: bytes):
+        if subscriber.closed:
+            return
+        if len(subscriber.pending) >= settings.events_max_pending:
+            # The client isn't keeping up; drop its backlog and tell it to resync
+            events_dropped_total.inc(len(subscriber.pending))
+            subscriber.pending.clear()
+            message = format_event(RESYNC_EVENT, {})
+        subscriber.pending.append(message)
+        if not subscriber.flushing:
+            self._start_flush(subscriber)
+
+    def _start_flush(self, subscriber: Subscriber):
+        subscriber.flushing = True
+        task = asyncio.create_task(self._flush(subscriber))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, subscriber: Subscriber):
+        try:
+            while subscriber.pending and not subscriber.closed:
+                body = b"".join(subscriber.pending)
+                subscriber.pending.clear()
+                await subscriber.send({"type": "http.response.body", "body": body, "more_body": True})
+        except Exception:
+            subscriber.closed = True  # The connection handler unsubscribes it on disconnect
+        finally:
+            subscriber.flushing = False
+
+    def dispatch(self, user_id: str, message: bytes):
+        """Deliver an encoded event to this process's streams for a user"""
+        for subscriber in tuple(self._subscribers.get(user_id, ())):
+            self._push(subscriber, message)
+
+    # Publishing
+
+    async def publish(self, user_id, event_type: str, data: dict):
+        """Send an event to every open stream of a user, on any worker. Never raises."""
+        user_id = str(user_id)
+        events_published_total.labels(event_type).inc()
+        if settings.event_bus != "mongo":
+            self.dispatch(user_id, format_event(event_type, data))
+            return
+        try:
+            await get_database()["events"].insert_one({
+                "user_id": user_id,
+                "type": event_type,
+                "data": data,
+                "created_at": datetime.utcnow(),
+            })
+        except Exception as e:
+            logger.warning(f"Failed to publish {event_type} event for user {user_id}: {e}")
+
+    # Background loops
+
+    async def start(self):
+        self._background.append(asyncio.create_task(self._keepalive_loop()))
+        if settings.event_bus == "mongo":
+            self._background.append(asyncio.create_task(self._tail_loop()))
+
+    async def close(self):
+        for task in self._background:
+            task.cancel()
+        self._background.clear()
+
+    async def _keepalive_loop(self):
+        """One timer for every stream, so proxies don't close idle connections"""
+        while True:
+            await asyncio.sleep(settings.events_keepalive_seconds)
+            for subscribers in tuple(self._subscribers.values()):
+                for subscriber in tuple(subscribers):
+                    if not subscriber.pending:
+                        self._push(subscriber, KEEPALIVE)
+
+    async def _ensure_bus(self):
+        db = get_database()
+        try:
+            await db.create_collection("events", capped=True, size=settings.event_bus_bytes)
+        except CollectionInvalid:
+            pass  # Another worker created it
+        # A tailable cursor on an empty capped collection dies at once
+        if await db["events"].find_one({}, {"_id": 1}) is None:
+            await db["events"].insert_one({"type": None, "created_at": datetime.utcnow()})
+
+    async def _tail_loop(self):
+        """Follow the shared capped collection and fan its events out locally"""
+        # ObjectIds from different processes aren't ordered, so filter by time with
+        # some slack for clock skew, and skip events already seen when reopening
+        since = datetime.utcnow()
+        seen_order: deque = deque(maxlen=10000)
+        seen = set()
+        while True:
+            try:
+                await self._ensure_bus()
+                cursor = get_database()["events"].find(
+                    {"created_at": {"$gte": since - timedelta(seconds=EVENT_BUS_SKEW_SECONDS)}},
+                    cursor_type=CursorType.TAILABLE_AWAIT
+                )
+                while cursor.alive:
+                    async for doc in cursor:
+                        if doc["_id"] in seen:
+                            continue
+                        if len(seen_order) == seen_order.maxlen:
+                            seen.discard(seen_order[0])
+                        seen_order.append(doc["_id"])
+                        seen.add(doc["_id"])
+                        since = max(since, doc["created_at"])
+                        if doc.get("type") and doc.get("user_id") in self._subscribers:
+                            self.dispatch(doc["user_id"], format_event(doc["type"], doc.get("data") or {}))
+                    await asyncio.sleep(0.1)  # Cursor timed out with no new events
+                # A tailable cursor dies when its query matches nothing yet; reopen shortly
+                await asyncio.sleep(0.5)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Event bus tail failed, retrying: {e}")
+                await asyncio.sleep(1)
+
+
+broker = EventBroker()
+
+
+class EventStreamResponse(Response):
+    """
+    text/event-stream response that stays open until the client disconnects.
+    Events are written by the broker; this only holds the subscription.
+    hello() is awaited once subscribed, so nothing published while the
+    client reads its state is missed. resume_id goes out as the hello's
+    event id, which EventSource sends back as Last-Event-ID when it reconnects.
+    """
+
+    media_type = "text/event-stream"
+
+    def __init__(self, user_id: str, hello: Callable[[], Awaitable[dict]], resume_id: Optional[str] = None):
+        # Like StreamingResponse, skip Response.__init__ so no Content-Length is set
+        self.status_code = 200
+        self.background = None
+        self.init_headers({"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})  # No proxy buffering
+        self.user_id = user_id
+        self.hello = hello
+        self.resume_id = resume_id
+
+    async def __call__(self, scope, receive, send):
+        subscriber = broker.subscribe(self.user_id, send, held=True)
+        try:
+            hello = format_event("hello", await self.hello(), self.resume_id)
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            first = b"retry: " + str(settings.events_retry_ms).encode() + b"\n\n" + hello
+            await send({"type": "http.response.body", "body": first, "more_body": True})
+            broker.release(subscriber)
+
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    break
+        finally:
+            broker.unsubscribe(subscriber)
+
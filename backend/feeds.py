@@ -0,0 +1,216 @@
+"""
+Podcast RSS feeds for collections
+
+Podcast apps poll feeds constantly, so rendered feeds are cached in memory
+and conditional GETs are answered from the cache without touching MongoDB.
+Every write that changes what a feed shows bumps the collection's
+feed_updated_at. The worker doing the write drops its cached copy at once.
+Other workers notice within FEED_REVALIDATE_SECONDS by reading the
+collection's timestamps (plus the name and description a feed shows), and
+only re-render when feed_updated_at moved.
+"""
+import asyncio
+import hashlib
+import hmac
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+from xml.sax.saxutils import escape, quoteattr
+from bson import ObjectId
+from config import settings
+from database import get_collection
+from tts_service import tts_service
+from metrics import feed_cache_requests_total
+from etags import etag_matches
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Only the fields a feed item needs - never the article content
+FEED_ITEM_PROJECTION = {"title": 1, "source_url": 1, "audio_url": 1, "duration_seconds": 1, "created_at": 1}
+# Only the collection fields a feed shows or is revalidated with
+FEED_COLLECTION_PROJECTION = {"feed_updated_at": 1, "created_at": 1, "name": 1, "description": 1}
+
+
+@dataclass
+class RenderedFeed:
+    body: bytes
+    etag: str
+    updated_at: datetime
+    checked_at: float  # Monotonic time the feed was last confirmed current
+
+    @property
+    def last_modified(self) -> str:
+        return format_datetime(self.updated_at.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def feed_token(collection_id: str) -> str:
+    """Unguessable token for a collection's feed URL, verifiable without a database read"""
+    message = f"feed:{collection_id}".encode("utf-8")
+    return hmac.new(settings.secret_key.encode("utf-8"), message, hashlib.sha256).hexdigest()[:32]
+
+
+def verify_feed_token(collection_id: str, token: str) -> bool:
+    return hmac.compare_digest(feed_token(collection_id), token or "")
+
+
+def _updated_at(collection: dict) -> datetime:
+    return collection.get("feed_updated_at") or collection["created_at"]
+
+
+def _format_duration(seconds) -> str:
+    seconds = int(seconds or 0)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def _audio_size(article_id: str) -> int:
+    try:
+        return (tts_service.storage_path / f"{article_id}.wav").stat().st_size
+    except OSError:
+        return 0
+
+
+def render_feed(collection: dict, articles: list[dict], base_url: str) -> bytes:
+    """RSS 2.0 with the iTunes tags podcast apps expect"""
+    feed_url = f"{base_url}/collections/{collection['_id']}/feed.xml"
+    items = []
+    for article in articles:
+        article_id = str(article["_id"])
+        created_at = article["created_at"].replace(tzinfo=timezone.utc)
+        link = f"\n      <link>{escape(article['source_url'])}</link>" if article.get("source_url") else ""
+        items.append(
+            f"""    <item>
+      <title>{escape(article["title"])}</title>
+      <guid isPermaLink="false">{article_id}</guid>{link}
+      <pubDate>{format_datetime(created_at, usegmt=True)}</pubDate>
+      <enclosure url={quoteattr(base_url + article["audio_url"])} length="{_audio_size(article_id)}" type="audio/wav"/>
+      <itunes:duration>{_format_duration(article.get("duration_seconds"))}</itunes:duration>
+    </item>"""
+        )
+    description = collection.get("description") or collection["name"]
+    updated_at = _updated_at(collection).replace(tzinfo=timezone.utc)
+    items_xml = "".join(item + "\n" for item in items)
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<rss version="2.0" xmlns:itunes="http://www.itunes.com/dtds/podcast-1.0.dtd">
+  <channel>
+    <title>{escape(collection["name"])}</title>
+    <link>{escape(feed_url)}</link>
+    <description>{escape(description)}</description>
+    <lastBuildDate>{format_datetime(updated_at, usegmt=True)}</lastBuildDate>
+    <itunes:summary>{escape(description)}</itunes:summary>
+{items_xml}  </channel>
+</rss>
+""".encode("utf-8")
+
+
+class FeedCache:
+    """LRU of rendered feeds keyed by collection and base URL"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, RenderedFeed]" = OrderedDict()
+        self._building: dict[tuple, asyncio.Task] = {}
+        self._invalidations = 0
+
+    def get_fresh(self, collection_id: str, base_url: str) -> Optional[RenderedFeed]:
+        """Cached feed that was confirmed current recently enough to serve as is"""
+        key = (collection_id, base_url)
+        feed = self._entries.get(key)
+        if feed is None or time.monotonic() - feed.checked_at > settings.feed_revalidate_seconds:
+            return None
+        self._entries.move_to_end(key)
+        return feed
+
+    async def get(self, collection_id: str, base_url: str) -> Optional[RenderedFeed]:
+        """Current feed, revalidating or rebuilding it once however many requests ask at once"""
+        key = (collection_id, base_url)
+        task = self._building.get(key)
+        if task is None:
+            task = asyncio.create_task(self._load(key))
+            self._building[key] = task
+            task.add_done_callback(lambda _: self._building.pop(key, None))
+        return await asyncio.shield(task)
+
+    def invalidate(self, collection_id: str):
+        self._invalidations += 1
+        for key in [key for key in self._entries if key[0] == collection_id]:
+            del self._entries[key]
+
+    async def _load(self, key: tuple) -> Optional[RenderedFeed]:
+        collection_id, base_url = key
+        invalidations = self._invalidations
+        collections = get_collection("collections")
+        articles = get_collection("articles")
+
+        collection = await collections.find_one({"_id": ObjectId(collection_id)}, FEED_COLLECTION_PROJECTION)
+        if collection is None:
+            self.invalidate(collection_id)
+            return None
+
+        updated_at = _updated_at(collection)
+        cached = self._entries.get(key)
+        if cached is not None and cached.updated_at == updated_at:
+            cached.checked_at = time.monotonic()
+            feed_cache_requests_total.labels("revalidated").inc()
+            return cached
+
+        cursor = articles.find(
+            {"collection_id": collection["_id"], "audio_url": {"$ne": None}},
+            FEED_ITEM_PROJECTION
+        ).sort("created_at", -1).limit(settings.feed_max_items)
+        items = [doc async for doc in cursor]
+        # File sizes for the enclosures come from disk
+        body = await asyncio.to_thread(render_feed, collection, items, base_url)
+        feed = RenderedFeed(
+            body=body,
+            etag=f'"{hashlib.sha1(body).hexdigest()[:20]}"',
+            updated_at=updated_at,
+            checked_at=time.monotonic()
+        )
+        feed_cache_requests_total.labels("rendered").inc()
+
+        if invalidations != self._invalidations:
+            return feed  # A write landed while rendering, don't cache what may be stale
+        self._entries[key] = feed
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return feed
+
+
+feed_cache = FeedCache(settings.feed_cache_entries)
+
+
+async def mark_feed_changed(collection_id):
+    """Record that a collection's feed content changed, for every worker"""
+    if not collection_id:
+        return
+    try:
+        await get_collection("collections").update_one(
+            {"_id": ObjectId(collection_id)},
+            {"$set": {"feed_updated_at": datetime.utcnow()}}
+        )
+    except Exception as e:
+        # Other workers pick the change up on the next write instead
+        logger.warning(f"Failed to mark feed of collection {collection_id} changed: {e}")
+    # After the write, so a concurrent rebuild can't cache the old timestamp
+    feed_cache.invalidate(str(collection_id))
+
+
+def not_modified(feed: RenderedFeed, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+    """Conditional GET check; If-None-Match wins over If-Modified-Since"""
+    if if_none_match is not None:
+        return etag_matches(if_none_match, feed.etag)
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        # HTTP dates have whole-second precision
+        return feed.updated_at.replace(tzinfo=timezone.utc, microsecond=0) <= since
+    return False
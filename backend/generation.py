@@ -0,0 +1,163 @@
+"""
+Audio generation jobs - runs each article's TTS work exactly once across
+all workers using lease locks, reuses audio for identical content and
+recovers jobs whose worker died
+"""
+import asyncio
+import hashlib
+from datetime import datetime, timedelta
+from bson import ObjectId
+from config import settings
+from database import get_collection
+from tts_service import tts_service
+from leases import Lease, lease_held
+from metrics import audio_generation_total, record_normalization
+from text_normalization import normalize_text
+from feeds import mark_feed_changed
+from etags import bump_library_version
+from events import broker
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Progress events per article at most, however many chunks it has
+PROGRESS_STEPS = 10
+
+
+def content_hash(content: str) -> str:
+    """Stable key for article content, shared by articles with identical text"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def _lease_key(digest: str) -> str:
+    return f"audio:{digest}"
+
+
+async def generate_audio_task(article_id: str) -> bool:
+    """
+    Generate an article's audio, started by the scheduler when it's the
+    article's turn. False if identical content is being generated under
+    another lease right now and the job should be retried shortly.
+    """
+    try:
+        # Loaded only now so queued jobs don't hold article text in memory
+        article = await get_collection("articles").find_one({"_id": ObjectId(article_id)}, {"content": 1})
+        if article is None:
+            return True  # Deleted while queued
+        return await _generate_once(article_id, article["content"])
+    except Exception as e:
+        logger.error(f"Failed to generate audio for article {article_id}: {e}")
+        audio_generation_total.labels("failure").inc()
+        return True
+
+
+async def _generate_once(article_id: str, content: str) -> bool:
+    articles = get_collection("articles")
+    digest = content_hash(content)
+
+    # One lease per distinct content: the same article or the same text saved
+    # twice is never synthesized by two workers at once
+    async with Lease(_lease_key(digest)) as lease:
+        if not lease.acquired:
+            logger.info(f"Audio for article {article_id} is already being generated elsewhere, retrying later")
+            return False
+
+        article = await articles.find_one_and_update(
+            {"_id": ObjectId(article_id), "audio_url": None},
+            {"$inc": {"audio_attempts": 1}, "$set": {"content_hash": digest}},
+            projection={"user_id": 1, "collection_id": 1}
+        )
+        if article is None:
+            return True  # Deleted, or another worker already finished it
+
+        # Reuse audio already generated for identical content
+        existing = await articles.find_one(
+            {"content_hash": digest, "audio_url": {"$ne": None}, "_id": {"$ne": ObjectId(article_id)}},
+            {"duration_seconds": 1}
+        )
+        if existing and tts_service.link_audio(str(existing["_id"]), article_id):
+            duration = existing.get("duration_seconds")
+            logger.info(f"Reused audio of article {existing['_id']} for article {article_id}")
+        else:
+            try:
+                duration = await _synthesize(article_id, article["user_id"], content)
+            except Exception:
+                await broker.publish(article["user_id"], "generation_failed", {"article_id": article_id})
+                raise
+
+        if lease.lost:
+            logger.warning(f"Lease lost while generating article {article_id}, discarding result")
+            return True
+
+        await articles.update_one(
+            {"_id": ObjectId(article_id)},
+            {"$set": {
+                "audio_url": tts_service.get_audio_url(article_id),
+                "duration_seconds": duration
+            }}
+        )
+        logger.info(f"Audio generated for article {article_id}")
+        audio_generation_total.labels("success").inc()
+        await broker.publish(article["user_id"], "audio_ready", {
+            "article_id": article_id,
+            "audio_url": tts_service.get_audio_url(article_id),
+            "duration_seconds": duration,
+        })
+        await bump_library_version(article["user_id"])
+        await mark_feed_changed(article.get("collection_id"))
+    return True
+
+
+async def _synthesize(article_id: str, user_id, content: str) -> int:
+    """Normalize and synthesize an article, publishing progress as chunks finish"""
+    # Normalizing a huge article is CPU work - keep it off the event loop
+    normalized = await asyncio.to_thread(normalize_text, content, settings.normalization_chunk_chars)
+    record_normalization(normalized)
+    if not normalized.chunks:
+        # Nothing speakable survived normalization, read the raw text instead
+        _, duration = await tts_service.generate_audio(content, article_id)
+        return duration
+
+    step = max(1, len(normalized.chunks) // PROGRESS_STEPS)
+
+    async def on_progress(done: int, total: int):
+        if done % step == 0 and done < total:
+            await broker.publish(user_id, "generation_progress", {
+                "article_id": article_id, "chunks_done": done, "chunks_total": total
+            })
+
+    _, duration = await tts_service.generate_audio(normalized.text, article_id, normalized.chunks, on_progress)
+    return duration
+
+
+async def recover_stalled_generations():
+    """
+    Periodically pick up articles still waiting for audio whose lease is
+    free - their worker died, restarted or lost the job - and queue them
+    again. Every worker runs this loop; the lease decides which one
+    regenerates each article.
+    """
+    from scheduler import scheduler  # Imported here: the scheduler runs this module's jobs
+
+    articles = get_collection("articles")
+    while True:
+        await asyncio.sleep(settings.generation_recovery_interval)
+        try:
+            cutoff = datetime.utcnow() - timedelta(seconds=settings.generation_recovery_grace_seconds)
+            cursor = articles.find(
+                {
+                    "audio_url": None,
+                    "created_at": {"$lt": cutoff},
+                    "audio_attempts": {"$not": {"$gte": settings.generation_max_attempts}},
+                },
+                {"content": 1, "content_hash": 1, "user_id": 1}
+            ).limit(settings.generation_recovery_batch)
+
+            async for doc in cursor:
+                digest = doc.get("content_hash") or content_hash(doc["content"])
+                if await lease_held(_lease_key(digest)):
+                    continue
+                if scheduler.submit(str(doc["_id"]), str(doc["user_id"]), len(doc["content"])):
+                    logger.info(f"Recovering stalled audio generation for article {doc['_id']}")
+        except Exception as e:
+            logger.error(f"Error recovering stalled generations: {e}")
@@ -0,0 +1,90 @@
+"""
+Readiness checks - probes MongoDB, the TTS pool and audio storage, with
+results cached so frequent health polling doesn't load the dependencies
+"""
+import asyncio
+import os
+import shutil
+import time
+from pathlib import Path
+from config import settings
+from database import get_database
+from tts_service import tts_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def _timed(check) -> dict:
+    """Run a check coroutine, recording its latency and any error"""
+    started = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(check(), timeout=settings.readiness_check_timeout)
+        result.setdefault("status", "ok")
+    except Exception as e:
+        result = {"status": "error", "error": str(e) or type(e).__name__}
+    result["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return result
+
+
+async def _check_mongo() -> dict:
+    await get_database().command("ping")
+    return {}
+
+
+async def _check_tts() -> dict:
+    backends = await tts_service.pool.check_health()
+    available = sum(1 for b in backends if b["available"])
+    return {
+        "status": "ok" if available else "error",
+        "available_backends": available,
+        "backends": backends,
+    }
+
+
+async def _check_storage() -> dict:
+    def check():
+        path = Path(settings.local_storage_path)
+        if not os.access(path, os.W_OK):
+            raise Exception(f"{path} is not writable")
+        usage = shutil.disk_usage(path)
+        free_mb = usage.free // (1024 * 1024)
+        return {
+            "status": "ok" if free_mb >= settings.readiness_min_free_mb else "error",
+            "free_mb": free_mb,
+        }
+
+    return await asyncio.to_thread(check)
+
+
+class ReadinessChecker:
+    """Runs all dependency checks concurrently and caches the combined result"""
+
+    def __init__(self):
+        self._result: dict = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def check(self) -> dict:
+        if self._fresh():
+            return self._result
+        async with self._lock:
+            # Another request may have refreshed while we waited
+            if self._fresh():
+                return self._result
+            mongo, tts, storage = await asyncio.gather(
+                _timed(_check_mongo), _timed(_check_tts), _timed(_check_storage)
+            )
+            dependencies = {"database": mongo, "tts": tts, "storage": storage}
+            ready = all(d["status"] == "ok" for d in dependencies.values())
+            if not ready:
+                logger.warning(f"Readiness check failed: {dependencies}")
+            self._result = {"status": "healthy" if ready else "unhealthy", "dependencies": dependencies}
+            self._checked_at = time.monotonic()
+            return self._result
+
+    def _fresh(self) -> bool:
+        return self._result is not None and time.monotonic() - self._checked_at < settings.readiness_cache_seconds
+
+
+readiness = ReadinessChecker()
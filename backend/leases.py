@@ -0,0 +1,118 @@
+"""
+Lease locks in MongoDB - lets one worker across the whole deployment own a
+piece of work, with heartbeats and automatic takeover of stalled leases
+"""
+import asyncio
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from config import settings
+from database import get_collection
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process; each Lease adds its own suffix to it
+OWNER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+async def acquire_lease(key: str, ttl_seconds: float, owner: str = OWNER_ID) -> bool:
+    """
+    Take the lease if it is free, expired, or already held by owner.
+    Two workers racing for a free lease both try to upsert the same _id,
+    so exactly one wins and the other gets a DuplicateKeyError.
+    """
+    leases = get_collection("leases")
+    now = datetime.utcnow()
+    try:
+        await leases.find_one_and_update(
+            {"_id": key, "$or": [{"expires_at": {"$lt": now}}, {"owner": owner}]},
+            {
+                "$set": {"owner": owner, "expires_at": now + timedelta(seconds=ttl_seconds), "heartbeat_at": now},
+                "$setOnInsert": {"acquired_at": now},
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+async def renew_lease(key: str, ttl_seconds: float, owner: str = OWNER_ID) -> bool:
+    """Extend a lease we hold; False if it expired and someone else took it"""
+    leases = get_collection("leases")
+    now = datetime.utcnow()
+    result = await leases.update_one(
+        {"_id": key, "owner": owner},
+        {"$set": {"expires_at": now + timedelta(seconds=ttl_seconds), "heartbeat_at": now}}
+    )
+    return result.matched_count == 1
+
+
+async def release_lease(key: str, owner: str = OWNER_ID):
+    leases = get_collection("leases")
+    await leases.delete_one({"_id": key, "owner": owner})
+
+
+async def lease_held(key: str) -> bool:
+    """Whether anyone currently holds an unexpired lease on key"""
+    leases = get_collection("leases")
+    return await leases.count_documents({"_id": key, "expires_at": {"$gte": datetime.utcnow()}}, limit=1) > 0
+
+
+class Lease:
+    """
+    Async context manager holding a lease for the duration of a block.
+    The lease is renewed in the background every third of its TTL. If a
+    renewal fails, `lost` is set and callers should not commit their results.
+
+        async with Lease("audio:abc") as lease:
+            if not lease.acquired:
+                return
+            ...
+            if not lease.lost:
+                save(result)
+    """
+
+    def __init__(self, key: str, ttl_seconds: float = None):
+        self.key = key
+        self.ttl = ttl_seconds or settings.lease_ttl_seconds
+        # Unique per holder: two coroutines of one process must not share a lease
+        self.owner = f"{OWNER_ID}:{uuid.uuid4().hex[:8]}"
+        self.acquired = False
+        self.lost = False
+        self._heartbeat: asyncio.Task = None
+
+    async def __aenter__(self) -> "Lease":
+        self.acquired = await acquire_lease(self.key, self.ttl, self.owner)
+        if self.acquired:
+            self._heartbeat = asyncio.create_task(self._renew_loop())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if not self.acquired:
+            return
+        self._heartbeat.cancel()
+        if not self.lost:
+            try:
+                await release_lease(self.key, self.owner)
+            except Exception as e:
+                # It will simply expire
+                logger.warning(f"Failed to release lease {self.key}: {e}")
+
+    async def _renew_loop(self):
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            try:
+                renewed = await renew_lease(self.key, self.ttl, self.owner)
+            except Exception as e:
+                logger.warning(f"Lease {self.key} heartbeat failed: {e}")
+                continue
+            if not renewed:
+                logger.warning(f"Lost lease {self.key} to another worker")
+                self.lost = True
+                return
@@ -5,14 +5,23 @@ FastAPI backend for Read Aloud Chrome Extension
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, Response, JSONResponse
 from pathlib import Path
 import logging
+import asyncio
 from contextlib import asynccontextmanager
 
-from database import connect_to_mongo, close_mongo_connection
+from database import connect_to_mongo, close_mongo_connection, ensure_indexes
 from config import settings
-from routers import auth, articles, collections
+from tts_service import tts_service
+from metrics import MetricsMiddleware, render_metrics, storage_usage_loop
+from health import readiness
+from admission import admission
+from generation import recover_stalled_generations
+from storage_gc import storage_gc_loop
+from events import broker
+from scheduler import scheduler
+from routers import auth, articles, collections, tts, events, generation
 
 # Configure logging
 logging.basicConfig(
@@ -29,12 +38,27 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting Read Aloud Cloud API...")
     await connect_to_mongo()
+    asyncio.create_task(ensure_indexes())  # Don't block startup on MongoDB
+    await tts_service.pool.start()
+    await broker.start()
+    await scheduler.start()
+    storage_task = asyncio.create_task(storage_usage_loop())
+    lag_task = asyncio.create_task(admission.monitor_loop_lag())
+    recovery_task = asyncio.create_task(recover_stalled_generations())
+    gc_task = asyncio.create_task(storage_gc_loop())
     logger.info("API ready!")
     
     yield  # Application runs here
     
     # Shutdown
     logger.info("Shutting down...")
+    storage_task.cancel()
+    lag_task.cancel()
+    recovery_task.cancel()
+    gc_task.cancel()
+    await scheduler.close()
+    await broker.close()
+    await tts_service.pool.close()
     await close_mongo_connection()
 
 
@@ -55,6 +79,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request metrics
+app.add_middleware(MetricsMiddleware)
+
 # Mount audio storage
 audio_path = Path(settings.local_storage_path)
 audio_path.mkdir(parents=True, exist_ok=True)
@@ -64,6 +91,9 @@ app.mount("/audio", StaticFiles(directory=str(audio_path)), name="audio")
 app.include_router(auth.router)
 app.include_router(articles.router)
 app.include_router(collections.router)
+app.include_router(tts.router)
+app.include_router(events.router)
+app.include_router(generation.router)
 
 
 # Health check endpoint
@@ -79,12 +109,24 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Detailed health check"""
-    return {
-        "status": "healthy",
-        "database": "connected",
-        "storage": "available"
+    """Readiness check - probes MongoDB, TTS and storage (cached for a few seconds)"""
+    result = await readiness.check()
+    body = {
+        **result,
+        "load": {
+            "generation_backlog": admission.generation_backlog,
+            "event_loop_lag_ms": round(admission.loop_lag * 1000, 1),
+        }
     }
+    status_code = 200 if result["status"] == "healthy" else 503
+    return JSONResponse(content=body, status_code=status_code)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics"""
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
 
 
 if __name__ == "__main__":
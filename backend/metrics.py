@@ -0,0 +1,225 @@
+"""
+Prometheus metrics - HTTP, MongoDB, TTS, audio generation and storage
+"""
+import asyncio
+import os
+import time
+from pathlib import Path
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, CONTENT_TYPE_LATEST, generate_latest, multiprocess
+)
+from pymongo import monitoring
+from config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TTS_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# HTTP
+http_requests_total = Counter(
+    "http_requests_total", "HTTP requests", ["method", "route", "status"]
+)
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS
+)
+
+# MongoDB
+mongo_command_duration_seconds = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency", ["command", "outcome"],
+    buckets=LATENCY_BUCKETS
+)
+
+# TTS
+tts_synthesis_duration_seconds = Histogram(
+    "tts_synthesis_duration_seconds", "TTS backend request latency", ["backend", "outcome"],
+    buckets=TTS_BUCKETS
+)
+tts_synthesis_bytes_total = Counter(
+    "tts_synthesis_bytes_total", "Audio bytes returned by TTS backends", ["backend"]
+)
+tts_chunk_cache_requests_total = Counter(
+    "tts_chunk_cache_requests_total", "TTS chunk cache lookups", ["result"]
+)
+
+# Push events
+event_streams_open = Gauge(
+    "event_streams_open", "Open server-sent event streams", multiprocess_mode="livesum"
+)
+events_published_total = Counter(
+    "events_published_total", "Push events published", ["type"]
+)
+events_dropped_total = Counter(
+    "events_dropped_total", "Push events dropped for clients that fell behind"
+)
+
+# Podcast feeds
+feed_cache_requests_total = Counter(
+    "feed_cache_requests_total", "Collection feed cache lookups", ["result"]
+)
+
+# Collection downloads
+collection_downloads_total = Counter(
+    "collection_downloads_total", "Collection bundle downloads started", ["kind"]
+)
+collection_download_bytes_total = Counter(
+    "collection_download_bytes_total", "Bytes of collection bundles sent"
+)
+
+# Text normalization
+text_normalization_chars_total = Counter(
+    "text_normalization_chars_total", "Characters entering and leaving text normalization", ["stage"]
+)
+text_normalization_removed_chars = Histogram(
+    "text_normalization_removed_chars", "Characters removed from each article by normalization",
+    buckets=(0, 100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+)
+
+# Audio generation
+# multiprocess_mode only applies when serve.py runs several workers
+audio_generation_queued = Gauge(
+    "audio_generation_queued", "Audio generation jobs waiting to start", multiprocess_mode="livesum"
+)
+audio_generation_in_progress = Gauge(
+    "audio_generation_in_progress", "Audio generation jobs currently synthesizing", multiprocess_mode="livesum"
+)
+audio_generation_total = Counter(
+    "audio_generation_total", "Finished audio generation jobs", ["outcome"]
+)
+# Labelled by whether the user already had work queued, not by user id, to keep series bounded
+generation_queue_wait_seconds = Histogram(
+    "generation_queue_wait_seconds", "Time audio generation jobs waited for their turn", ["user_class"],
+    buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0)
+)
+generation_users_queued = Gauge(
+    "generation_users_queued", "Users with audio generation jobs waiting", multiprocess_mode="livesum"
+)
+
+# Load shedding
+event_loop_lag_seconds = Gauge(
+    "event_loop_lag_seconds", "Smoothed event loop scheduling lag", multiprocess_mode="livemax"
+)
+requests_shed_total = Counter(
+    "requests_shed_total", "Requests rejected by admission control", ["kind"]
+)
+
+# Storage
+audio_storage_bytes = Gauge(
+    "audio_storage_bytes", "Bytes used by stored audio files", multiprocess_mode="livemax"
+)
+audio_storage_files = Gauge(
+    "audio_storage_files", "Number of stored audio files", multiprocess_mode="livemax"
+)
+
+storage_gc_files_deleted_total = Counter(
+    "storage_gc_files_deleted_total", "Audio files deleted by the storage reconciler", ["reason"]
+)
+storage_gc_reclaimed_bytes_total = Counter(
+    "storage_gc_reclaimed_bytes_total", "Disk space freed by the storage reconciler"
+)
+storage_gc_missing_audio_total = Counter(
+    "storage_gc_missing_audio_total", "Articles whose audio file was missing and got requeued"
+)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording request count and latency per route template.
+    Labels use the matched route path (e.g. /articles/{article_id}) so
+    cardinality stays bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        root_path = scope.get("root_path", "")
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            if route is not None:
+                path = route.path
+            elif scope.get("root_path", "") != root_path:
+                path = scope["root_path"] + "/{path}"  # Mounted app, e.g. /audio
+            else:
+                path = "unmatched"
+            labels = (scope["method"], path, str(status_code))
+            http_requests_total.labels(*labels).inc()
+            http_request_duration_seconds.labels(*labels).observe(time.perf_counter() - started)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Records the duration of every MongoDB command"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongo_command_duration_seconds.labels(event.command_name, "success").observe(
+            event.duration_micros / 1_000_000
+        )
+
+    def failed(self, event):
+        mongo_command_duration_seconds.labels(event.command_name, "failure").observe(
+            event.duration_micros / 1_000_000
+        )
+
+
+def record_normalization(normalized):
+    """Record how much text normalization removed from one article"""
+    text_normalization_chars_total.labels("input").inc(normalized.original_chars)
+    text_normalization_chars_total.labels("output").inc(len(normalized.text))
+    text_normalization_removed_chars.observe(normalized.removed_chars)
+
+
+def _scan_storage(path: Path) -> tuple[int, int]:
+    """Total bytes and file count under the storage directory"""
+    total_bytes = 0
+    total_files = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total_bytes += os.stat(os.path.join(root, name)).st_size
+                total_files += 1
+            except OSError:
+                continue
+    return total_bytes, total_files
+
+
+async def storage_usage_loop():
+    """Refresh storage gauges in a worker thread, off the request path"""
+    path = Path(settings.local_storage_path)
+    while True:
+        try:
+            total_bytes, total_files = await asyncio.to_thread(_scan_storage, path)
+            audio_storage_bytes.set(total_bytes)
+            audio_storage_files.set(total_files)
+        except Exception as e:
+            logger.error(f"Error scanning audio storage: {e}")
+        await asyncio.sleep(settings.metrics_storage_scan_interval)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Current metrics in Prometheus text format, with content type"""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        # Aggregate the files written by every worker process
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(), CONTENT_TYPE_LATEST
@@ -2,9 +2,10 @@
 Pydantic models for API requests and responses
 """
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Optional, List, Annotated
 from datetime import datetime
 from bson import ObjectId
+from config import settings
 
 
 class PyObjectId(ObjectId):
@@ -100,6 +101,10 @@ class CollectionResponse(BaseModel):
     created_at: datetime
 
 
+class CollectionFeedResponse(BaseModel):
+    feed_url: str
+
+
 # Audio Generation
 class AudioGenerateRequest(BaseModel):
     article_id: str
@@ -108,3 +113,29 @@ class AudioGenerateRequest(BaseModel):
 class AudioGenerateResponse(BaseModel):
     audio_url: str
     duration_seconds: int
+
+
+class GenerationQueueResponse(BaseModel):
+    queued: int
+    running: int
+    oldest_wait_seconds: float
+    daily_quota_chars: int  # 0 means unlimited
+    daily_used_chars: int
+
+
+# Events
+class EventTicketResponse(BaseModel):
+    ticket: str
+    expires_in: int  # Seconds
+
+
+# TTS Chunks
+ChunkText = Annotated[str, Field(min_length=1, max_length=settings.tts_chunk_max_chars)]
+
+
+class TTSChunkRequest(BaseModel):
+    text: ChunkText
+    voice: Optional[str] = Field(None, max_length=100)
+    rate: float = Field(1.0, gt=0, le=4.0)
+    # Next chunks in playback order, prefetched in the background
+    upcoming: List[ChunkText] = Field([], max_length=settings.tts_prefetch_chunks)
@@ -1,14 +1,21 @@
 """
 Article routes - CRUD operations for saved articles
 """
-from fastapi import APIRouter, HTTPException, status, Depends, BackgroundTasks
+from fastapi import APIRouter, HTTPException, status, Depends
 from typing import List
 from models import ArticleCreate, ArticleResponse, ArticleUpdate
-from auth import get_current_user_id
+from auth import get_current_user, get_current_user_id
 from database import get_collection
 from bson import ObjectId
+from pymongo import ReturnDocument
 from datetime import datetime
 from tts_service import tts_service
+from admission import admit_synthesis, admit_expensive_read
+from generation import content_hash
+from scheduler import scheduler, admit_generation, refund_generation
+from serialization import ARTICLE_PROJECTION, article_to_dict, json_response
+from feeds import mark_feed_changed
+from etags import library_etag, etag_headers, bump_library_version
 import logging
 
 logger = logging.getLogger(__name__)
@@ -51,11 +58,15 @@ async def create_default_collection(user_id: str) -> ObjectId:
         raise
 
 
-@router.post("", response_model=ArticleResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "",
+    response_model=ArticleResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(admit_synthesis)]
+)
 async def create_article(
     article: ArticleCreate,
-    background_tasks: BackgroundTasks,
-    user_id: str = Depends(get_current_user_id)
+    user=Depends(get_current_user)
 ):
     """
     Save a new article with proper collection handling.
@@ -66,6 +77,7 @@ async def create_article(
     3. If no collection_id provided, create/use default
     4. Always ensure article has a collection_id (never None in DB)
     """
+    user_id = str(user["_id"])
     articles = get_collection("articles")
     collections = get_collection("collections")
     
@@ -73,6 +85,7 @@ async def create_article(
         "user_id": ObjectId(user_id),
         "title": article.title,
         "content": article.content,
+        "content_hash": content_hash(article.content),
         "source_url": article.source_url,
         "audio_url": None,
         "duration_seconds": None,
@@ -121,11 +134,18 @@ async def create_article(
             detail="Failed to assign collection to article"
         )
     
-    result = await articles.insert_one(article_doc)
+    # Charged just before the insert, and given back if the article never lands
+    article_doc["quota_chars"] = await admit_generation(user, len(article.content), article_doc["created_at"])
+    try:
+        result = await articles.insert_one(article_doc)
+    except Exception:
+        await refund_generation(user_id, article_doc["quota_chars"], article_doc["created_at"])
+        raise
     article_id = str(result.inserted_id)
+    await bump_library_version(user_id)
     
-    # Generate audio in background
-    background_tasks.add_task(generate_audio_task, article_id, article.content)
+    # Generate audio when it's this user's turn
+    scheduler.submit(article_id, user_id, len(article.content), user.get("generation_weight", 1.0))
     
     return ArticleResponse(
         id=article_id,
@@ -140,32 +160,18 @@ async def create_article(
     )
 
 
-async def generate_audio_task(article_id: str, content: str):
-    """Background task to generate audio"""
-    try:
-        audio_path, duration = await tts_service.generate_audio(content, article_id)
-        audio_url = tts_service.get_audio_url(article_id)
-        
-        # Update article with audio info
-        articles = get_collection("articles")
-        await articles.update_one(
-            {"_id": ObjectId(article_id)},
-            {"$set": {
-                "audio_url": audio_url,
-                "duration_seconds": duration
-            }}
-        )
-        logger.info(f"Audio generated for article {article_id}")
-    except Exception as e:
-        logger.error(f"Failed to generate audio for article {article_id}: {e}")
-
-
-@router.get("", response_model=List[ArticleResponse])
+# library_etag runs first, so an unchanged refresh gets its 304 even under load
+@router.get(
+    "",
+    response_model=List[ArticleResponse],
+    dependencies=[Depends(library_etag), Depends(admit_expensive_read)]
+)
 async def list_articles(
     skip: int = 0,
     limit: int = 50,
     collection_id: str = None,
-    user_id: str = Depends(get_current_user_id)
+    user_id: str = Depends(get_current_user_id),
+    etag: str = Depends(library_etag)
 ):
     """List user's saved articles"""
     articles = get_collection("articles")
@@ -174,53 +180,30 @@ async def list_articles(
     if collection_id:
         query["collection_id"] = ObjectId(collection_id)
     
-    cursor = articles.find(query).sort("created_at", -1).skip(skip).limit(limit)
-    results = []
+    cursor = articles.find(query, ARTICLE_PROJECTION).sort("created_at", -1).skip(skip).limit(limit)
+    results = [article_to_dict(doc) async for doc in cursor]
     
-    async for doc in cursor:
-        results.append(ArticleResponse(
-            id=str(doc["_id"]),
-            user_id=str(doc["user_id"]),
-            title=doc["title"],
-            content=doc["content"],
-            source_url=doc.get("source_url"),
-            audio_url=doc.get("audio_url"),
-            duration_seconds=doc.get("duration_seconds"),
-            play_position_seconds=doc.get("play_position_seconds", 0),
-            created_at=doc["created_at"],
-            last_played_at=doc.get("last_played_at"),
-            collection_id=str(doc["collection_id"]) if doc.get("collection_id") else None
-        ))
-    
-    return results
+    return json_response(results, headers=etag_headers(etag))
 
 
 @router.get("/{article_id}", response_model=ArticleResponse)
-async def get_article(article_id: str, user_id: str = Depends(get_current_user_id)):
+async def get_article(
+    article_id: str,
+    user_id: str = Depends(get_current_user_id),
+    etag: str = Depends(library_etag)
+):
     """Get a specific article"""
     articles = get_collection("articles")
     
     article = await articles.find_one({
         "_id": ObjectId(article_id),
         "user_id": ObjectId(user_id)
-    })
+    }, ARTICLE_PROJECTION)
     
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
     
-    return ArticleResponse(
-        id=str(article["_id"]),
-        user_id=str(article["user_id"]),
-        title=article["title"],
-        content=article["content"],
-        source_url=article.get("source_url"),
-        audio_url=article.get("audio_url"),
-        duration_seconds=article.get("duration_seconds"),
-        play_position_seconds=article.get("play_position_seconds", 0),
-        created_at=article["created_at"],
-        last_played_at=article.get("last_played_at"),
-        collection_id=str(article["collection_id"]) if article.get("collection_id") else None
-    )
+    return json_response(article_to_dict(article), headers=etag_headers(etag))
 
 
 @router.patch("/{article_id}", response_model=ArticleResponse)
@@ -243,16 +226,29 @@ async def update_article(
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
     
-    result = await articles.update_one(
+    # Play positions are saved every few seconds, so the updated article is
+    # returned by the update itself rather than read back afterwards
+    article = await articles.find_one_and_update(
         {"_id": ObjectId(article_id), "user_id": ObjectId(user_id)},
-        {"$set": update_data}
+        {"$set": update_data},
+        projection=ARTICLE_PROJECTION,
+        return_document=ReturnDocument.AFTER
     )
     
-    if result.matched_count == 0:
+    if article is None:
         raise HTTPException(status_code=404, detail="Article not found")
     
-    # Return updated article
-    return await get_article(article_id, user_id)
+    # Play position doesn't show in the feed, a new title does
+    if "title" in update_data:
+        await bump_library_version(user_id)
+        await mark_feed_changed(article.get("collection_id"))
+    else:
+        # Saved every few seconds while listening - tell other devices where playback
+        # is, rather than have them refetch the library. Listings carry the position,
+        # so the version (and with it their ETags) still moves.
+        await bump_library_version(user_id, "position_changed", {"article_id": article_id, **update_data})
+    
+    return json_response(article_to_dict(article))
 
 
 @router.delete("/{article_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -260,15 +256,26 @@ async def delete_article(article_id: str, user_id: str = Depends(get_current_use
     """Delete an article"""
     articles = get_collection("articles")
     
-    result = await articles.delete_one({
+    article = await articles.find_one_and_delete({
         "_id": ObjectId(article_id),
         "user_id": ObjectId(user_id)
+    }, projection={
+        "collection_id": 1, "audio_url": 1, "audio_attempts": 1, "quota_chars": 1, "created_at": 1
     })
     
-    if result.deleted_count == 0:
+    if article is None:
         raise HTTPException(status_code=404, detail="Article not found")
     
+    # Generation counts an attempt before any work, so without one nothing was spent
+    if not article.get("audio_url") and not article.get("audio_attempts"):
+        await refund_generation(user_id, article.get("quota_chars", 0), article["created_at"])
+    
     # Delete audio file
     tts_service.delete_audio(article_id)
     
+    await bump_library_version(user_id)
+    # Only articles with audio appear in the feed
+    if article.get("audio_url"):
+        await mark_feed_changed(article.get("collection_id"))
+    
     return None
\ No newline at end of file
@@ -2,6 +2,7 @@
 Authentication routes - register, login
 """
 from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
 from datetime import timedelta
 from models import UserCreate, UserLogin, Token, UserResponse
 from auth import get_password_hash, verify_password, create_access_token
@@ -34,7 +35,8 @@ async def register(user: UserCreate):
     # Create new user
     user_doc = {
         "email": user.email,
-        "password_hash": get_password_hash(user.password),
+        # bcrypt is deliberately slow - hash off the event loop
+        "password_hash": await asyncio.to_thread(get_password_hash, user.password),
         "name": user.name,
         "created_at": datetime.utcnow()
     }
@@ -64,7 +66,7 @@ async def login(user: UserLogin):
         )
     
     # Verify password
-    if not verify_password(user.password, db_user["password_hash"]):
+    if not await asyncio.to_thread(verify_password, user.password, db_user["password_hash"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password"
@@ -1,13 +1,21 @@
 """
 Collection routes - organize articles into collections/playlists
 """
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Request
+from fastapi.responses import Response
 from typing import List
-from models import CollectionCreate, CollectionResponse, CollectionUpdate
+from models import CollectionCreate, CollectionResponse, CollectionUpdate, CollectionFeedResponse
 from auth import get_current_user_id
 from database import get_collection  # ✅ Import the helper function
 from bson import ObjectId
 from datetime import datetime
+from admission import admit_expensive_read
+from serialization import collection_to_dict, json_response
+from config import settings
+from metrics import feed_cache_requests_total
+from etags import library_etag, etag_headers, bump_library_version
+from feeds import feed_cache, feed_token, verify_feed_token, mark_feed_changed, not_modified
+from bundles import BundleResponse, build_bundle, parse_range
 
 router = APIRouter(prefix="/collections", tags=["Collections"])
 
@@ -30,6 +38,7 @@ async def create_collection(
     
     # ✅ FIX: Await the insert operation
     result = await collections_col.insert_one(collection_doc)
+    await bump_library_version(user_id)
     
     return CollectionResponse(
         id=str(result.inserted_id),
@@ -41,35 +50,33 @@ async def create_collection(
     )
 
 
-@router.get("", response_model=List[CollectionResponse])
-async def list_collections(user_id: str = Depends(get_current_user_id)):
+# library_etag runs first, so an unchanged refresh gets its 304 even under load
+@router.get(
+    "",
+    response_model=List[CollectionResponse],
+    dependencies=[Depends(library_etag), Depends(admit_expensive_read)]
+)
+async def list_collections(
+    user_id: str = Depends(get_current_user_id),
+    etag: str = Depends(library_etag)
+):
     """List user's collections"""
     # ✅ FIX: Use imported get_collection function with different variable name
     collections_col = get_collection("collections")
     articles_col = get_collection("articles")
     
-    # ✅ FIX: Create cursor from async find
+    # Count articles for every collection in one aggregation instead of one query each
+    counts = {}
+    async for row in articles_col.aggregate([
+        {"$match": {"user_id": ObjectId(user_id), "collection_id": {"$ne": None}}},
+        {"$group": {"_id": "$collection_id", "count": {"$sum": 1}}}
+    ]):
+        counts[row["_id"]] = row["count"]
+    
     cursor = collections_col.find({"user_id": ObjectId(user_id)}).sort("created_at", -1)
-    results = []
-    
-    # ✅ FIX: Iterate through cursor properly
-    async for doc in cursor:
-        # Count articles in this collection
-        article_count = await articles_col.count_documents({
-            "user_id": ObjectId(user_id),
-            "collection_id": doc["_id"]
-        })
-        
-        results.append(CollectionResponse(
-            id=str(doc["_id"]),
-            user_id=str(doc["user_id"]),
-            name=doc["name"],
-            description=doc.get("description"),
-            article_count=article_count,
-            created_at=doc["created_at"]
-        ))
-    
-    return results
+    results = [collection_to_dict(doc, counts.get(doc["_id"], 0)) async for doc in cursor]
+    
+    return json_response(results, headers=etag_headers(etag))
 
 
 @router.get("/{collection_id}", response_model=CollectionResponse)
@@ -135,6 +142,9 @@ async def update_collection(
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Collection not found")
     
+    await bump_library_version(user_id)
+    await mark_feed_changed(collection_id)
+    
     # ✅ FIX: Call the renamed function
     return await get_collection_details(collection_id, user_id)
 
@@ -166,4 +176,93 @@ async def delete_collection(
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Collection not found")
     
-    return None
\ No newline at end of file
+    await bump_library_version(user_id)
+    feed_cache.invalidate(collection_id)
+    
+    return None
+
+
+def _base_url(request: Request) -> str:
+    return (settings.public_base_url or str(request.base_url)).rstrip("/")
+
+
+@router.get("/{collection_id}/feed", response_model=CollectionFeedResponse)
+async def get_collection_feed_url(
+    collection_id: str,
+    request: Request,
+    user_id: str = Depends(get_current_user_id)
+):
+    """Podcast feed URL for a collection, to paste into any podcast app"""
+    collections_col = get_collection("collections")
+    
+    exists = await collections_col.count_documents(
+        {"_id": ObjectId(collection_id), "user_id": ObjectId(user_id)}, limit=1
+    )
+    if not exists:
+        raise HTTPException(status_code=404, detail="Collection not found")
+    
+    return CollectionFeedResponse(
+        feed_url=f"{_base_url(request)}/collections/{collection_id}/feed.xml?token={feed_token(collection_id)}"
+    )
+
+
+@router.get("/{collection_id}/feed.xml", response_class=Response)
+async def get_collection_feed(collection_id: str, token: str, request: Request):
+    """
+    Podcast RSS feed of a collection's generated audio. Authenticated by the
+    token in the feed URL, since podcast apps can't send a bearer token.
+    Polls of an unchanged feed are answered from memory, usually with a 304.
+    """
+    if not ObjectId.is_valid(collection_id) or not verify_feed_token(collection_id, token):
+        raise HTTPException(status_code=404, detail="Feed not found")
+    
+    base_url = _base_url(request)
+    feed = feed_cache.get_fresh(collection_id, base_url)
+    if feed is not None:
+        feed_cache_requests_total.labels("hit").inc()
+    else:
+        feed = await feed_cache.get(collection_id, base_url)
+        if feed is None:
+            raise HTTPException(status_code=404, detail="Feed not found")
+    
+    headers = {
+        "ETag": feed.etag,
+        "Last-Modified": feed.last_modified,
+        "Cache-Control": "no-cache",  # Clients may keep it, but must revalidate
+    }
+    if not_modified(feed, request.headers.get("if-none-match"), request.headers.get("if-modified-since")):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=feed.body, media_type="application/rss+xml", headers=headers)
+
+
+@router.get(
+    "/{collection_id}/download",
+    response_class=BundleResponse,
+    dependencies=[Depends(admit_expensive_read)]
+)
+async def download_collection(
+    collection_id: str,
+    request: Request,
+    user_id: str = Depends(get_current_user_id)
+):
+    """
+    Tar of the collection's generated audio plus manifest.json (titles,
+    durations and start times), for offline listening in one request.
+    Supports Range with If-Range, so interrupted downloads resume.
+    """
+    collections_col = get_collection("collections")
+    
+    coll = await collections_col.find_one(
+        {"_id": ObjectId(collection_id), "user_id": ObjectId(user_id)},
+        {"name": 1, "description": 1, "user_id": 1, "created_at": 1}
+    )
+    if not coll:
+        raise HTTPException(status_code=404, detail="Collection not found")
+    
+    bundle = await build_bundle(coll)
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    # A stale If-Range means the archive changed since the client started: send it all again
+    if if_range is None or if_range == bundle.etag:
+        byte_range = parse_range(request.headers.get("range"), bundle.size)
+    return BundleResponse(bundle, byte_range)
@@ -0,0 +1,77 @@
+"""
+Event routes - server-sent event stream of audio and library changes
+"""
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Header, status
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from models import EventTicketResponse
+from auth import get_current_user, get_user_from_token, create_stream_ticket, EVENTS_TICKET, EVENTS_RESUME
+from config import settings
+from database import get_collection
+from events import broker, EventStreamResponse
+
+router = APIRouter(prefix="/events", tags=["Events"])
+
+optional_bearer = HTTPBearer(auto_error=False)
+
+
+@router.post("/ticket", response_model=EventTicketResponse)
+async def create_event_ticket(current_user: dict = Depends(get_current_user)):
+    """
+    Short-lived ticket for opening the event stream with `?ticket=`.
+    It is only accepted by GET /events, so a ticket that ends up in an
+    access log can't be used against the rest of the API.
+    """
+    return EventTicketResponse(
+        ticket=create_stream_ticket(current_user["email"]),
+        expires_in=settings.events_ticket_seconds
+    )
+
+
+@router.get("", response_class=EventStreamResponse)
+async def event_stream(
+    ticket: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_bearer)
+):
+    """
+    Stream of the user's events: `audio_ready`, `generation_progress`,
+    `generation_failed`, `library_changed`, `position_changed` and
+    `resync`. The first event, `hello`, carries the current library version.
+    EventSource can't send headers, so browsers pass a ticket from
+    POST /events/ticket as `?ticket=` instead of the access token.
+    `hello`'s event id lets EventSource reconnect by itself for
+    EVENTS_RESUME_SECONDS after that, once the ticket has expired.
+    """
+    user = None
+    if credentials:
+        user = await get_user_from_token(credentials.credentials)
+    elif last_event_id:
+        # Reconnects reuse the original URL, whose ticket has usually expired by now
+        try:
+            user = await get_user_from_token(last_event_id, purpose=EVENTS_RESUME)
+        except HTTPException:
+            pass
+    if user is None:
+        if not ticket:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Not authenticated",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        user = await get_user_from_token(ticket, purpose=EVENTS_TICKET)
+    
+    if broker.connections >= settings.events_max_connections:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many open event streams",
+            headers={"Retry-After": str(settings.shed_retry_after_seconds)},
+        )
+    
+    async def hello() -> dict:
+        # Read once subscribed: the version loaded to authenticate may already be stale
+        doc = await get_collection("users").find_one({"_id": user["_id"]}, {"library_version": 1})
+        return {"library_version": (doc or user).get("library_version", 0)}
+
+    resume_id = create_stream_ticket(user["email"], EVENTS_RESUME, settings.events_resume_seconds)
+    return EventStreamResponse(str(user["_id"]), hello, resume_id)
@@ -0,0 +1,19 @@
+"""
+Generation routes - the caller's place in the audio generation queue
+"""
+from fastapi import APIRouter, Depends
+from models import GenerationQueueResponse
+from auth import get_current_user
+from scheduler import scheduler, daily_quota, daily_usage
+
+router = APIRouter(prefix="/generation", tags=["Generation"])
+
+
+@router.get("/queue", response_model=GenerationQueueResponse)
+async def generation_queue(user=Depends(get_current_user)):
+    """Articles waiting for audio on this worker and today's quota usage"""
+    return GenerationQueueResponse(
+        **scheduler.user_status(str(user["_id"])),
+        daily_quota_chars=daily_quota(user),
+        daily_used_chars=await daily_usage(user)
+    )
@@ -0,0 +1,46 @@
+"""
+TTS routes - cached chunk synthesis with lookahead prefetch for live playback
+"""
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import Response
+from models import TTSChunkRequest
+from auth import get_current_user_id
+from tts_service import tts_service
+from tts_pool import TTSRequestError
+from admission import admit_synthesis
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/tts", tags=["TTS"])
+
+
+@router.post("/chunk", response_class=Response, dependencies=[Depends(admit_synthesis)])
+async def synthesize_chunk(
+    chunk: TTSChunkRequest,
+    user_id: str = Depends(get_current_user_id)
+):
+    """
+    Synthesize one chunk of text for playback.
+    Repeated chunks come from the cache, and the `upcoming` chunks are
+    synthesized in the background while this one plays.
+    """
+    try:
+        audio, cached = await tts_service.synthesize_chunk(
+            chunk.text,
+            voice=chunk.voice,
+            rate=chunk.rate,
+            upcoming=chunk.upcoming
+        )
+    except TTSRequestError as e:
+        # e.g. an unknown voice: the client's mistake, passed back as it is
+        raise HTTPException(status_code=e.status, detail=e.detail or "TTS request rejected")
+    except Exception as e:
+        logger.error(f"Chunk synthesis failed for user {user_id}: {e}")
+        raise HTTPException(status_code=502, detail="TTS server error")
+
+    return Response(
+        content=audio,
+        media_type="audio/wav",
+        headers={"X-Cache": "HIT" if cached else "MISS"}
+    )
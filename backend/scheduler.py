@@ -0,0 +1,255 @@
+"""
+Fair-share scheduling of audio generation
+
+Generation jobs wait in one queue per user and are started by deficit
+round robin: each pass over the users with queued work tops a user's
+deficit up by GENERATION_QUANTUM_CHARS times their weight, and a job
+starts once its user's deficit covers its length in characters. A user
+bulk-importing hundreds of articles therefore takes turns with everyone
+else instead of going first, and a single interactive save waits for at
+most one round.
+
+At most GENERATION_CONCURRENCY jobs run per process. While other users
+are waiting, nobody gets more than GENERATION_USER_CONCURRENCY of them;
+slots nobody else wants go to whoever has work, so a lone bulk import
+still uses the whole process. Characters queued per UTC day are limited
+by a quota kept in MongoDB, so it holds across workers. Queues live in
+each process; the stalled job recovery requeues anything lost in a
+restart.
+"""
+import asyncio
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import HTTPException, status
+from pymongo.errors import DuplicateKeyError
+from config import settings
+from database import get_collection
+from generation import generate_audio_task
+from metrics import (
+    audio_generation_queued, audio_generation_in_progress, generation_queue_wait_seconds, generation_users_queued
+)
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Job:
+    article_id: str
+    user_id: str
+    cost: int  # Characters to synthesize
+    weight: float = 1.0
+    enqueued_at: float = field(default_factory=time.monotonic)
+    user_class: str = "interactive"  # "bulk" when the user already had work queued
+
+
+@dataclass
+class UserQueue:
+    jobs: deque = field(default_factory=deque)
+    weight: float = 1.0
+    deficit: float = 0.0
+    running: int = 0
+
+
+class GenerationScheduler:
+    def __init__(self):
+        self._users: dict[str, UserQueue] = {}
+        self._active: deque = deque()  # Users with queued jobs, in round robin order
+        self._article_ids: set[str] = set()  # Queued or running, so recovery doesn't add duplicates
+        self._wakeup = asyncio.Event()
+        self._tasks: set[asyncio.Task] = set()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.queued = 0
+        self.running = 0
+
+    @property
+    def backlog(self) -> int:
+        return self.queued + self.running
+
+    def queued_for(self, user_id: str) -> int:
+        user = self._users.get(user_id)
+        return len(user.jobs) if user else 0
+
+    def user_status(self, user_id: str) -> dict:
+        user = self._users.get(user_id)
+        if user is None:
+            return {"queued": 0, "running": 0, "oldest_wait_seconds": 0.0}
+        oldest = time.monotonic() - user.jobs[0].enqueued_at if user.jobs else 0.0
+        return {"queued": len(user.jobs), "running": user.running, "oldest_wait_seconds": round(oldest, 1)}
+
+    # Submitting
+
+    def submit(self, article_id: str, user_id: str, cost: int, weight: float = 1.0) -> bool:
+        """Queue an article for generation; False if it is already queued or running"""
+        if article_id in self._article_ids:
+            return False
+        self._article_ids.add(article_id)
+        self._enqueue(Job(article_id, user_id, max(cost, 1), max(weight, 0.01)))
+        return True
+
+    def _enqueue(self, job: Job):
+        user = self._users.setdefault(job.user_id, UserQueue())
+        user.weight = job.weight
+        job.user_class = "bulk" if user.jobs or user.running else "interactive"
+        job.enqueued_at = time.monotonic()
+        if not user.jobs:
+            self._active.append(job.user_id)
+            generation_users_queued.set(len(self._active))
+        user.jobs.append(job)
+        self.queued += 1
+        audio_generation_queued.inc()
+        self._wakeup.set()
+
+    # Dispatching
+
+    def _next_job(self, user_limit: Optional[int]) -> Optional[Job]:
+        """Deficit round robin over users with queued work and fewer than user_limit jobs running"""
+        quantum = settings.generation_quantum_chars
+        if not any(user_limit is None or self._users[u].running < user_limit for u in self._active):
+            return None
+        while True:
+            user_id = self._active[0]
+            user = self._users[user_id]
+            if user_limit is not None and user.running >= user_limit:
+                self._active.rotate(-1)
+                continue
+            if user.deficit < user.jobs[0].cost:
+                # A new turn: top up, and let the next user go if it still isn't enough
+                user.deficit += quantum * user.weight
+                if user.deficit < user.jobs[0].cost:
+                    self._active.rotate(-1)
+                    continue
+            job = user.jobs.popleft()
+            user.deficit -= job.cost
+            if not user.jobs:
+                # Idle users don't bank credit for later
+                user.deficit = 0.0
+                self._active.popleft()
+                generation_users_queued.set(len(self._active))
+            elif user.deficit < user.jobs[0].cost:
+                self._active.rotate(-1)  # End of this user's turn
+            return job
+
+    async def _dispatch_loop(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            while self.running < settings.generation_concurrency:
+                # Slots nobody under their per-user limit is waiting for go to whoever has work
+                job = self._next_job(settings.generation_user_concurrency) or self._next_job(None)
+                if job is None:
+                    break
+                self._start(job)
+
+    def _start(self, job: Job):
+        user = self._users[job.user_id]
+        user.running += 1
+        self.queued -= 1
+        self.running += 1
+        audio_generation_queued.dec()
+        audio_generation_in_progress.inc()
+        generation_queue_wait_seconds.labels(job.user_class).observe(time.monotonic() - job.enqueued_at)
+        task = asyncio.create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job: Job):
+        finished = True
+        try:
+            finished = await generate_audio_task(job.article_id)
+        finally:
+            user = self._users[job.user_id]
+            user.running -= 1
+            if not user.jobs and not user.running:
+                del self._users[job.user_id]
+            if finished:
+                self._article_ids.discard(job.article_id)
+            else:
+                # Identical content is being synthesized under another lease. Try again
+                # shortly, without holding a slot, and reuse its audio once it's done.
+                asyncio.get_running_loop().call_later(settings.generation_lease_retry_seconds, self._enqueue, job)
+            self.running -= 1
+            audio_generation_in_progress.dec()
+            self._wakeup.set()
+
+    async def start(self):
+        self._dispatcher = asyncio.create_task(self._dispatch_loop())
+
+    async def close(self):
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+
+
+scheduler = GenerationScheduler()
+
+
+def daily_quota(user: dict) -> int:
+    """A user document may override the default quota; 0 means unlimited"""
+    return user.get("generation_daily_quota_chars", settings.generation_daily_quota_chars)
+
+
+def _usage_id(user_id, day: datetime) -> str:
+    return f"{user_id}:{day.date().isoformat()}"
+
+
+async def admit_generation(user: dict, chars: int, now: datetime) -> int:
+    """
+    Check a user may queue chars more characters for generation and count
+    them against the quota of now's (UTC) day. Returns the characters
+    charged, 0 when the user has no quota. Raises 429 when the user's queue
+    is full or the quota would be exceeded, 413 when it never could be.
+    """
+    if scheduler.queued_for(str(user["_id"])) >= settings.generation_user_max_queued:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many articles waiting for audio, please retry later",
+            headers={"Retry-After": str(settings.shed_retry_after_seconds)}
+        )
+    quota = daily_quota(user)
+    if not quota:
+        return 0
+    if chars > quota:
+        # The upsert below would insert today's document however large chars is
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Article is longer than the daily audio generation quota"
+        )
+    tomorrow = datetime(now.year, now.month, now.day) + timedelta(days=1)
+    usage = get_collection("generation_usage")
+    try:
+        # Like leases: when today's document exists but is too full to match, the
+        # upsert collides with it and the reservation is refused
+        await usage.update_one(
+            {"_id": _usage_id(user["_id"], now), "chars": {"$lte": quota - chars}},
+            {"$inc": {"chars": chars}, "$setOnInsert": {"expires_at": tomorrow}},
+            upsert=True
+        )
+    except DuplicateKeyError:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Daily audio generation quota reached",
+            headers={"Retry-After": str(int((tomorrow - now).total_seconds()) + 1)}
+        )
+    return chars
+
+
+async def refund_generation(user_id, chars: int, charged_at: datetime):
+    """Give back characters admit_generation charged for audio that was never generated"""
+    if not chars:
+        return
+    try:
+        await get_collection("generation_usage").update_one(
+            {"_id": _usage_id(user_id, charged_at), "chars": {"$gte": chars}},
+            {"$inc": {"chars": -chars}}
+        )
+    except Exception as e:
+        # The user just has less quota left today
+        logger.error(f"Failed to refund {chars} generation characters to user {user_id}: {e}")
+
+
+async def daily_usage(user: dict) -> int:
+    doc = await get_collection("generation_usage").find_one({"_id": _usage_id(user["_id"], datetime.utcnow())})
+    return doc["chars"] if doc else 0
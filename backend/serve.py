@@ -0,0 +1,38 @@
+"""
+Production launcher - runs the API in several worker processes
+
+Workers coordinate audio generation through lease locks in MongoDB, so
+any number of them (on one or many hosts) can run side by side.
+
+    WORKERS=4 python serve.py
+"""
+import os
+import shutil
+import tempfile
+import uvicorn
+from config import settings
+
+
+if __name__ == "__main__":
+    if settings.workers > 1:
+        # Workers write metrics to a shared directory that /metrics aggregates
+        metrics_dir = os.environ.setdefault(
+            "PROMETHEUS_MULTIPROC_DIR",
+            os.path.join(tempfile.gettempdir(), "readaloud-metrics")
+        )
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir)
+        # Push events must reach streams held by any worker
+        os.environ.setdefault("EVENT_BUS", "mongo")
+
+    uvicorn.run(
+        "main:app",
+        host=settings.host,
+        port=settings.port,
+        workers=settings.workers,
+        timeout_graceful_shutdown=settings.graceful_shutdown_seconds,  # Event streams never end on their own
+        # X-Forwarded-* set the client address and the scheme of feed URLs, so
+        # they are only believed from the proxies listed here
+        proxy_headers=True,
+        forwarded_allow_ips=settings.forwarded_allow_ips
+    )
@@ -0,0 +1,251 @@
+"""
+Audio storage reconciler - finds audio files and article documents that no
+longer match and repairs both sides
+
+Two streaming passes, each holding one batch in memory at a time:
+- files -> articles: scan the storage directory, look each batch of
+  {article_id}.wav names up with one $in query, and delete files whose
+  article is gone, plus partial files left by crashed generation jobs
+- articles -> files: stream articles that have an audio_url and check each
+  batch of files on disk. Articles whose file is missing are flagged and
+  put back in line for generation.
+
+Only files older than STORAGE_GC_GRACE_SECONDS are touched, and one worker
+at a time runs the reconciler under a lease.
+
+Run once by hand (add --dry-run to only report):
+    python storage_gc.py
+"""
+import asyncio
+import os
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from pathlib import Path
+from bson import ObjectId
+from bson.errors import InvalidId
+from config import settings
+from database import get_collection
+from tts_service import tts_service, PARTIAL_SUFFIX
+from leases import Lease
+from etags import bump_library_version
+from feeds import mark_feed_changed
+from metrics import storage_gc_files_deleted_total, storage_gc_reclaimed_bytes_total, storage_gc_missing_audio_total
+import logging
+
+logger = logging.getLogger(__name__)
+
+LEASE_KEY = "storage-gc"
+
+
+@dataclass
+class ReconcileReport:
+    files_scanned: int = 0
+    orphans_deleted: int = 0
+    partials_deleted: int = 0
+    bytes_reclaimed: int = 0
+    articles_scanned: int = 0
+    missing_audio_flagged: int = 0
+    errors: int = 0
+
+
+@dataclass
+class _StoredFile:
+    path: str
+    name: str
+    size: int
+    links: int
+    mtime: float
+
+
+def _next_files(entries, count: int) -> list[_StoredFile]:
+    """Up to count regular files from a scandir iterator (runs in a worker thread)"""
+    batch = []
+    for entry in entries:
+        try:
+            if not entry.is_file(follow_symlinks=False):
+                continue
+            stat = entry.stat(follow_symlinks=False)
+        except OSError:
+            continue
+        batch.append(_StoredFile(entry.path, entry.name, stat.st_size, stat.st_nlink, stat.st_mtime))
+        if len(batch) >= count:
+            break
+    return batch
+
+
+def _delete_files(files: list[_StoredFile]) -> tuple[list[_StoredFile], int]:
+    """Delete files; returns the ones deleted and the number of failures"""
+    deleted, failed = [], 0
+    for stored in files:
+        try:
+            os.unlink(stored.path)
+            deleted.append(stored)
+        except FileNotFoundError:
+            continue
+        except OSError as e:
+            logger.warning(f"Could not delete {stored.path}: {e}")
+            failed += 1
+    return deleted, failed
+
+
+def _missing(paths: list[Path]) -> list[bool]:
+    return [not path.exists() for path in paths]
+
+
+def _article_id(name: str):
+    stem, ext = os.path.splitext(name)
+    if ext != ".wav":
+        return None
+    try:
+        return ObjectId(stem)
+    except (InvalidId, TypeError):
+        return None
+
+
+async def _reconcile_files(report: ReconcileReport, dry_run: bool):
+    articles = get_collection("articles")
+    cutoff = time.time() - settings.storage_gc_grace_seconds
+    with os.scandir(tts_service.storage_path) as entries:
+        while True:
+            batch = await asyncio.to_thread(_next_files, entries, settings.storage_gc_batch)
+            if not batch:
+                return
+            report.files_scanned += len(batch)
+
+            partials, candidates = [], {}
+            for stored in batch:
+                if stored.mtime > cutoff:
+                    continue  # Possibly still being written or linked
+                if stored.name.endswith(PARTIAL_SUFFIX):
+                    partials.append(stored)
+                    continue
+                article_id = _article_id(stored.name)
+                if article_id is not None:  # Leave files we don't recognize alone
+                    candidates[article_id] = stored
+
+            orphans = []
+            if candidates:
+                existing = {
+                    doc["_id"] async for doc in articles.find({"_id": {"$in": list(candidates)}}, {"_id": 1})
+                }
+                orphans = [stored for article_id, stored in candidates.items() if article_id not in existing]
+
+            for reason, files in (("orphan", orphans), ("partial", partials)):
+                if not files:
+                    continue
+                if dry_run:
+                    deleted, failed = files, 0
+                else:
+                    deleted, failed = await asyncio.to_thread(_delete_files, files)
+                    storage_gc_files_deleted_total.labels(reason).inc(len(deleted))
+                report.errors += failed
+                if reason == "orphan":
+                    report.orphans_deleted += len(deleted)
+                else:
+                    report.partials_deleted += len(deleted)
+                # Hard-linked audio (reused for identical content) frees nothing until the last link goes
+                reclaimed = sum(stored.size for stored in deleted if stored.links <= 1)
+                report.bytes_reclaimed += reclaimed
+                if not dry_run:
+                    storage_gc_reclaimed_bytes_total.inc(reclaimed)
+
+
+async def _flag_missing(articles, docs: list[dict], report: ReconcileReport, dry_run: bool):
+    paths = [tts_service.storage_path / f"{doc['_id']}.wav" for doc in docs]
+    missing = await asyncio.to_thread(_missing, paths)
+    for doc, is_missing in zip(docs, missing):
+        if not is_missing:
+            continue
+        report.missing_audio_flagged += 1
+        if dry_run:
+            continue
+        logger.warning(f"Audio of article {doc['_id']} is missing, queueing it for regeneration")
+        # Matching audio_url too leaves an article alone if it was regenerated meanwhile.
+        # Clearing it lets the stalled generation recovery pick the article up again.
+        result = await articles.update_one(
+            {"_id": doc["_id"], "audio_url": doc["audio_url"]},
+            {"$set": {
+                "audio_url": None,
+                "duration_seconds": None,
+                "audio_attempts": 0,
+                "audio_missing_at": datetime.utcnow(),
+            }}
+        )
+        if result.modified_count:
+            storage_gc_missing_audio_total.inc()
+            await bump_library_version(doc["user_id"])
+            await mark_feed_changed(doc.get("collection_id"))
+
+
+async def _reconcile_articles(report: ReconcileReport, dry_run: bool):
+    articles = get_collection("articles")
+    cursor = articles.find(
+        {"audio_url": {"$ne": None}},
+        {"audio_url": 1, "user_id": 1, "collection_id": 1}
+    ).batch_size(settings.storage_gc_batch)
+
+    docs = []
+    async for doc in cursor:
+        report.articles_scanned += 1
+        docs.append(doc)
+        if len(docs) >= settings.storage_gc_batch:
+            await _flag_missing(articles, docs, report, dry_run)
+            docs = []
+    if docs:
+        await _flag_missing(articles, docs, report, dry_run)
+
+
+async def reconcile_storage(dry_run: bool = False) -> ReconcileReport:
+    """One full reconciliation of local audio storage against the articles collection"""
+    report = ReconcileReport()
+    await _reconcile_files(report, dry_run)
+    if report.files_scanned == 0:
+        # An empty directory is far more likely a missing volume than lost audio
+        logger.warning("Audio storage is empty, skipping the missing audio check")
+    else:
+        await _reconcile_articles(report, dry_run)
+    return report
+
+
+async def storage_gc_loop():
+    """Reconcile storage every STORAGE_GC_INTERVAL on whichever worker holds the lease"""
+    if settings.storage_type != "local" or settings.storage_gc_interval <= 0:
+        return
+    while True:
+        await asyncio.sleep(settings.storage_gc_interval)
+        try:
+            async with Lease(LEASE_KEY) as lease:
+                if not lease.acquired:
+                    continue
+                started = time.perf_counter()
+                report = await reconcile_storage()
+                logger.info(
+                    f"Storage reconciled in {time.perf_counter() - started:.1f}s: "
+                    f"deleted {report.orphans_deleted} orphaned and {report.partials_deleted} partial files, "
+                    f"reclaimed {report.bytes_reclaimed} bytes, "
+                    f"flagged {report.missing_audio_flagged} articles with missing audio"
+                )
+        except Exception as e:
+            logger.error(f"Error reconciling audio storage: {e}")
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from database import connect_to_mongo, close_mongo_connection
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="report without deleting or flagging anything")
+    args = parser.parse_args()
+
+    async def main():
+        await connect_to_mongo()
+        try:
+            report = await reconcile_storage(dry_run=args.dry_run)
+            print(json.dumps(asdict(report), indent=2))
+        finally:
+            await close_mongo_connection()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
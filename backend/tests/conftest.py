@@ -0,0 +1,43 @@
+"""
+Shared test setup: the app is configured through the environment before
+any backend module is imported, and MongoDB is an in-memory stand-in.
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+import pytest
+import pytest_asyncio
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("SECRET_KEY", "test")
+os.environ["LOCAL_STORAGE_PATH"] = tempfile.mkdtemp(prefix="readaloud-test-")
+os.environ["TTS_HEALTH_CHECK_INTERVAL"] = "0"
+
+
+@pytest.fixture
+def mongo():
+    """A fresh in-memory database per test"""
+    from mongomock_motor import AsyncMongoMockClient
+    from database import mongodb
+    mongodb.client = AsyncMongoMockClient()
+    yield mongodb.client
+    mongodb.client = None
+
+
+@pytest_asyncio.fixture
+async def client(mongo, monkeypatch):
+    """HTTP client for the app, signed in as a fresh user, with generation left to the test"""
+    import httpx
+    from auth import create_access_token
+    from database import get_collection
+    from scheduler import scheduler
+    import main
+    monkeypatch.setattr(scheduler, "submit", lambda *args, **kwargs: True)
+    user = {"email": "reader@example.com", "password_hash": "x", "created_at": datetime.utcnow()}
+    await get_collection("users").insert_one(user)
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': user['email']})}"}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", headers=headers) as client:
+        yield client
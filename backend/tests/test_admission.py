@@ -0,0 +1,41 @@
+import pytest
+from fastapi import HTTPException
+from admission import admit_synthesis
+from config import settings
+from scheduler import scheduler, UserQueue
+
+
+@pytest.fixture
+def backlog(monkeypatch):
+    monkeypatch.setattr(settings, "max_generation_backlog", 10)
+    monkeypatch.setattr(scheduler, "_users", {"bulk": UserQueue(jobs=[object()])})
+
+    def set_backlog(size: int):
+        monkeypatch.setattr(scheduler, "queued", size)
+
+    return set_backlog
+
+
+async def _admitted(user_id: str) -> bool:
+    try:
+        await admit_synthesis(user_id)
+        return True
+    except HTTPException as error:
+        assert error.status_code == 503
+        return False
+
+
+@pytest.mark.asyncio
+async def test_backlog_sheds_users_with_queued_work_first(backlog):
+    backlog(9)
+    assert await _admitted("bulk") and await _admitted("reader")
+    backlog(15)
+    assert not await _admitted("bulk")
+    assert await _admitted("reader")
+
+
+@pytest.mark.asyncio
+async def test_hard_backlog_limit_sheds_everyone(backlog):
+    backlog(20)
+    assert not await _admitted("bulk")
+    assert not await _admitted("reader")
@@ -0,0 +1,88 @@
+import io
+import tarfile
+from datetime import datetime
+import orjson
+import pytest
+from fastapi import HTTPException
+from bson import ObjectId
+from bundles import parse_range
+from database import get_collection
+from tts_service import tts_service
+
+SIZES = (0, 1, 511, 512, 513, 5000)
+
+
+async def _collection(client) -> tuple[str, list[bytes]]:
+    collection = (await client.post("/collections", json={"name": "Offline"})).json()
+    audio = []
+    for i, size in enumerate(SIZES):
+        article_id = (await get_collection("articles").insert_one({
+            "user_id": ObjectId(collection["user_id"]),
+            "collection_id": ObjectId(collection["id"]),
+            "title": f"Article {i}",
+            "audio_url": "/audio/x.wav",
+            "duration_seconds": i,
+            "created_at": datetime(2026, 1, 1, 0, i),
+        })).inserted_id
+        data = bytes(range(256)) * (size // 256) + bytes(range(size % 256))
+        (tts_service.storage_path / f"{article_id}.wav").write_bytes(data)
+        audio.append(data)
+    return collection["id"], audio
+
+
+@pytest.mark.asyncio
+async def test_bundle_is_a_tar_of_manifest_and_audio(client):
+    collection_id, audio = await _collection(client)
+    response = await client.get(f"/collections/{collection_id}/download")
+    assert response.status_code == 200
+    assert int(response.headers["content-length"]) == len(response.content)
+
+    with tarfile.open(fileobj=io.BytesIO(response.content)) as archive:
+        manifest = orjson.loads(archive.extractfile("Offline/manifest.json").read())
+        items = manifest["articles"]
+        assert [item["size_bytes"] for item in items] == list(reversed(SIZES))  # Newest first
+        for item, data in zip(items, reversed(audio)):
+            assert archive.extractfile(f"Offline/{item['file']}").read() == data
+
+
+@pytest.mark.asyncio
+async def test_ranges_are_slices_of_the_full_archive(client):
+    collection_id, _ = await _collection(client)
+    path = f"/collections/{collection_id}/download"
+    full = await client.get(path)
+    body, etag, size = full.content, full.headers["etag"], len(full.content)
+
+    for header, start, stop in (
+        ("bytes=0-0", 0, 1),
+        ("bytes=511-1024", 511, 1025),
+        ("bytes=1000-", 1000, size),
+        (f"bytes=700-{size * 2}", 700, size),
+        ("bytes=-600", size - 600, size),
+        (f"bytes=-{size * 2}", 0, size),
+    ):
+        response = await client.get(path, headers={"Range": header, "If-Range": etag})
+        assert response.status_code == 206, header
+        assert response.content == body[start:stop], header
+        assert response.headers["content-range"] == f"bytes {start}-{stop - 1}/{size}"
+
+    # A stale If-Range, or a range that can't be parsed, gets the whole archive
+    for headers in ({"Range": "bytes=10-", "If-Range": '"stale"'}, {"Range": "bytes=5-3"}):
+        response = await client.get(path, headers=headers)
+        assert response.status_code == 200 and response.content == body
+
+    response = await client.get(path, headers={"Range": f"bytes={size}-"})
+    assert response.status_code == 416
+    assert response.headers["content-range"] == f"bytes */{size}"
+
+
+def test_parse_range():
+    assert parse_range(None, 100) is None
+    assert parse_range("bytes=0-9,20-29", 100) is None  # Multiple ranges: send everything
+    assert parse_range("bytes=5-3", 100) is None
+    assert parse_range("bytes=a-b", 100) is None
+    assert parse_range("bytes=90-", 100) == (90, 100)
+    assert parse_range("bytes=-10", 100) == (90, 100)
+    for unsatisfiable in ("bytes=100-", "bytes=-0"):
+        with pytest.raises(HTTPException) as error:
+            parse_range(unsatisfiable, 100)
+        assert error.value.status_code == 416
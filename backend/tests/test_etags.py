@@ -0,0 +1,65 @@
+import pytest
+from etags import etag_matches
+from generation import generate_audio_task
+from tts_service import tts_service
+import routers.articles
+
+
+async def _etag(client, path: str = "/articles") -> str:
+    response = await client.get(path)
+    assert response.status_code == 200
+    return response.headers["etag"]
+
+
+def test_etag_matching():
+    assert etag_matches('"abc"', '"abc"')
+    assert etag_matches('W/"abc"', '"abc"')
+    assert etag_matches('"other", W/"abc"', '"abc"')
+    assert etag_matches("*", '"abc"')
+    assert not etag_matches('"other"', '"abc"')
+    assert not etag_matches(None, '"abc"')
+
+
+@pytest.mark.asyncio
+async def test_unchanged_library_gets_304_before_querying(client, monkeypatch):
+    etag = await _etag(client)
+
+    def no_queries(name):
+        raise AssertionError(f"queried {name} for an unchanged library")
+
+    monkeypatch.setattr(routers.articles, "get_collection", no_queries)
+    for if_none_match in (etag, f"W/{etag}", "*"):
+        response = await client.get("/articles", headers={"If-None-Match": if_none_match})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+
+
+@pytest.mark.asyncio
+async def test_every_library_write_changes_the_etag(client, monkeypatch):
+    async def fake_audio(text, article_id, chunks=None, on_progress=None):
+        return "", 3
+
+    monkeypatch.setattr(tts_service, "generate_audio", fake_audio)
+    etags = [await _etag(client)]
+
+    async def write(method: str, path: str, **kwargs):
+        response = await client.request(method, path, **kwargs)
+        assert response.status_code < 300, response.text
+        etags.append(await _etag(client))
+        return response.json() if response.content else None
+
+    collection = await write("POST", "/collections", json={"name": "Reading"})
+    await write("PATCH", f"/collections/{collection['id']}", json={"description": "Longer reads"})
+    article = await write("POST", "/articles", json={
+        "title": "Title", "content": "Some article text.", "collection_id": collection["id"]
+    })
+    renamed = await write("PATCH", f"/articles/{article['id']}", json={"title": "New title"})
+    assert renamed["title"] == "New title"
+    played = await write("PATCH", f"/articles/{article['id']}", json={"play_position_seconds": 12})
+    assert played["title"] == "New title" and played["play_position_seconds"] == 12
+    await generate_audio_task(article["id"])
+    etags.append(await _etag(client))
+    await write("DELETE", f"/articles/{article['id']}")
+    await write("DELETE", f"/collections/{collection['id']}")
+
+    assert len(set(etags)) == len(etags) == 9
@@ -0,0 +1,130 @@
+from datetime import datetime
+import pytest
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+import asyncio
+from auth import create_access_token, create_stream_ticket, get_user_from_token
+from database import get_collection
+from etags import bump_library_version
+from events import broker, EventStreamResponse
+from models import ArticleUpdate
+from routers.articles import update_article
+from routers.events import create_event_ticket, event_stream
+
+
+async def _user() -> dict:
+    user = {"email": "reader@example.com", "password_hash": "x", "created_at": datetime.utcnow()}
+    user["_id"] = (await get_collection("users").insert_one(user)).inserted_id
+    return user
+
+
+def _bearer(token: str) -> HTTPAuthorizationCredentials:
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+@pytest.mark.asyncio
+async def test_ticket_opens_event_stream(mongo):
+    user = await _user()
+    ticket = (await create_event_ticket(user)).ticket
+    response = await event_stream(ticket=ticket, last_event_id=None, credentials=None)
+    assert isinstance(response, EventStreamResponse)
+    assert response.user_id == str(user["_id"])
+
+
+@pytest.mark.asyncio
+async def test_access_token_rejected_in_query_string(mongo):
+    user = await _user()
+    token = create_access_token({"sub": user["email"]})
+    with pytest.raises(HTTPException) as error:
+        await event_stream(ticket=token, last_event_id=None, credentials=None)
+    assert error.value.status_code == 401
+    # Still fine as a header
+    assert isinstance(await event_stream(ticket=None, last_event_id=None, credentials=_bearer(token)), EventStreamResponse)
+
+
+@pytest.mark.asyncio
+async def test_ticket_rejected_as_bearer_token(mongo):
+    user = await _user()
+    ticket = (await create_event_ticket(user)).ticket
+    with pytest.raises(HTTPException) as error:
+        await get_user_from_token(ticket)
+    assert error.value.status_code == 401
+    with pytest.raises(HTTPException):
+        await event_stream(ticket=None, last_event_id=None, credentials=_bearer(ticket))
+
+
+@pytest.mark.asyncio
+async def test_reconnect_after_ticket_expired(mongo):
+    user = await _user()
+    response = await event_stream(ticket=(await create_event_ticket(user)).ticket, last_event_id=None, credentials=None)
+    expired = create_stream_ticket(user["email"], seconds=-1)
+
+    # EventSource reconnects with the original URL and the hello's id as Last-Event-ID
+    resumed = await event_stream(ticket=expired, last_event_id=response.resume_id, credentials=None)
+    assert resumed.user_id == str(user["_id"])
+    with pytest.raises(HTTPException) as error:
+        await event_stream(ticket=expired, last_event_id=None, credentials=None)
+    assert error.value.status_code == 401
+    # A resume id is no good as a bearer token or a ticket
+    with pytest.raises(HTTPException):
+        await event_stream(ticket=response.resume_id, last_event_id=None, credentials=None)
+    with pytest.raises(HTTPException):
+        await get_user_from_token(response.resume_id)
+
+
+@pytest.mark.asyncio
+async def test_hello_is_read_after_subscribing(mongo):
+    user = await _user()
+    response = await event_stream(ticket=(await create_event_ticket(user)).ticket, last_event_id=None, credentials=None)
+    # A write lands between authenticating and the stream starting...
+    await bump_library_version(user["_id"])
+    hello = response.hello
+
+    async def hello_with_write():
+        data = await hello()
+        # ...and another while the hello is being read
+        await bump_library_version(user["_id"])
+        return data
+
+    response.hello = hello_with_write
+    sent = []
+    disconnect = asyncio.Event()
+
+    async def send(message):
+        sent.append(message)
+        if b"library_changed" in message.get("body", b""):
+            disconnect.set()
+
+    async def receive():
+        await disconnect.wait()
+        return {"type": "http.disconnect"}
+
+    await asyncio.wait_for(response({"type": "http"}, receive, send), timeout=2)
+    bodies = b"".join(message.get("body", b"") for message in sent)
+    assert sent[0]["type"] == "http.response.start"
+    assert bodies.index(b'event: hello\ndata: {"library_version":1}') < bodies.index(b"event: library_changed")
+    assert b'{"library_version":2}' in bodies
+
+
+@pytest.mark.asyncio
+async def test_play_position_sends_position_changed(mongo, monkeypatch):
+    published = []
+
+    async def publish(user_id, event_type, data):
+        published.append((event_type, data))
+
+    monkeypatch.setattr(broker, "publish", publish)
+    user = await _user()
+    article_id = (await get_collection("articles").insert_one({
+        "user_id": user["_id"], "collection_id": None, "title": "Old", "content": "text",
+        "audio_url": None, "created_at": datetime.utcnow(),
+    })).inserted_id
+
+    await update_article(str(article_id), ArticleUpdate(play_position_seconds=42), str(user["_id"]))
+    await update_article(str(article_id), ArticleUpdate(title="New"), str(user["_id"]))
+
+    assert published == [
+        ("position_changed", {"article_id": str(article_id), "play_position_seconds": 42, "library_version": 1}),
+        ("library_changed", {"library_version": 2}),
+    ]
+    assert (await get_collection("users").find_one({"_id": user["_id"]}))["library_version"] == 2
@@ -0,0 +1,30 @@
+from datetime import datetime
+import pytest
+from database import get_collection
+from feeds import FeedCache
+
+
+@pytest.mark.asyncio
+async def test_feed_reads_only_the_collection_fields_it_shows(mongo, monkeypatch):
+    collection_id = (await get_collection("collections").insert_one({
+        "user_id": None,
+        "name": "Morning reads",
+        "description": "Saved & spoken",
+        "notes": "x" * 100_000,  # Anything else on the document stays in MongoDB
+        "created_at": datetime.utcnow(),
+    })).inserted_id
+    collections = type(get_collection("collections"))
+    find_one = collections.find_one
+    loaded = []
+
+    async def spy(self, *args, **kwargs):
+        doc = await find_one(self, *args, **kwargs)
+        loaded.append(doc)
+        return doc
+
+    monkeypatch.setattr(collections, "find_one", spy)
+    feed = await FeedCache(4).get(str(collection_id), "http://localhost")
+
+    assert b"<title>Morning reads</title>" in feed.body
+    assert b"Saved &amp; spoken" in feed.body
+    assert set(loaded[0]) == {"_id", "name", "description", "created_at"}
@@ -0,0 +1,61 @@
+import asyncio
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from config import settings
+from database import get_collection
+from generation import content_hash, generate_audio_task, _lease_key
+from leases import Lease
+from scheduler import GenerationScheduler
+from tts_service import tts_service
+
+
+async def _article(content: str, audio: bytes = None) -> str:
+    article_id = ObjectId()
+    await get_collection("articles").insert_one({
+        "_id": article_id,
+        "user_id": ObjectId(),
+        "collection_id": None,
+        "content": content,
+        "content_hash": content_hash(content),
+        "audio_url": None,
+        "created_at": datetime.utcnow(),
+    })
+    if audio is not None:
+        (tts_service.storage_path / f"{article_id}.wav").write_bytes(audio)
+    return str(article_id)
+
+
+async def _finish(article_id: str, duration: int):
+    await get_collection("articles").update_one(
+        {"_id": ObjectId(article_id)},
+        {"$set": {"audio_url": tts_service.get_audio_url(article_id), "duration_seconds": duration}}
+    )
+
+
+@pytest.mark.asyncio
+async def test_identical_content_waits_for_lease_then_reuses_audio(mongo, monkeypatch):
+    monkeypatch.setattr(settings, "generation_lease_retry_seconds", 0.05)
+    first = await _article("the same popular page", audio=b"RIFF-audio")
+    second = await _article("the same popular page")
+    scheduler = GenerationScheduler()
+    await scheduler.start()
+    try:
+        async with Lease(_lease_key(content_hash("the same popular page"))):
+            # Another worker is still synthesizing this text
+            assert await generate_audio_task(second) is False
+            scheduler.submit(second, "user", 20)
+            await asyncio.sleep(0.2)
+            await _finish(first, 7)
+        for _ in range(50):
+            doc = await get_collection("articles").find_one({"_id": ObjectId(second)})
+            if doc["audio_url"]:
+                break
+            await asyncio.sleep(0.05)
+    finally:
+        await scheduler.close()
+
+    assert doc["audio_url"] == tts_service.get_audio_url(second)
+    assert doc["duration_seconds"] == 7
+    assert (tts_service.storage_path / f"{second}.wav").read_bytes() == b"RIFF-audio"
+    assert scheduler.backlog == 0
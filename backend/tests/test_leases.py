@@ -0,0 +1,36 @@
+import asyncio
+from datetime import datetime, timedelta
+import pytest
+from database import get_collection
+from leases import Lease
+
+
+@pytest.mark.asyncio
+async def test_lease_is_exclusive_within_a_process(mongo):
+    async with Lease("audio:x") as first:
+        async with Lease("audio:x") as second:
+            assert first.acquired
+            assert not second.acquired
+        # The refused holder leaving must not release the lease
+        doc = await get_collection("leases").find_one({"_id": "audio:x"})
+        assert doc["owner"] == first.owner
+    assert await get_collection("leases").find_one({"_id": "audio:x"}) is None
+
+
+@pytest.mark.asyncio
+async def test_expired_lease_is_taken_over(mongo):
+    stale = Lease("audio:y", ttl_seconds=3)
+    await stale.__aenter__()
+    stale._heartbeat.cancel()  # Its worker died
+    await get_collection("leases").update_one(
+        {"_id": "audio:y"}, {"$set": {"expires_at": datetime.utcnow() - timedelta(seconds=1)}}
+    )
+
+    async with Lease("audio:y") as takeover:
+        assert takeover.acquired
+        # The old holder's next heartbeat notices and discards its result
+        stale._heartbeat = asyncio.create_task(stale._renew_loop())
+        await asyncio.sleep(1.1)
+        assert stale.lost
+        doc = await get_collection("leases").find_one({"_id": "audio:y"})
+        assert doc["owner"] == takeover.owner
@@ -0,0 +1,73 @@
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from config import settings
+from database import get_collection
+from models import ArticleCreate
+from routers.articles import create_article, delete_article
+from scheduler import scheduler, daily_usage
+
+
+@pytest.fixture
+def quota(monkeypatch):
+    monkeypatch.setattr(settings, "generation_daily_quota_chars", 100)
+    monkeypatch.setattr(scheduler, "submit", lambda *args, **kwargs: True)  # Nothing is generated
+
+
+async def _user() -> dict:
+    user = {"email": "reader@example.com", "password_hash": "x", "created_at": datetime.utcnow()}
+    user["_id"] = (await get_collection("users").insert_one(user)).inserted_id
+    return user
+
+
+def _article(chars: int) -> ArticleCreate:
+    return ArticleCreate(title="Article", content="x" * chars)
+
+
+@pytest.mark.asyncio
+async def test_first_save_longer_than_quota_is_refused(mongo, quota):
+    user = await _user()
+    with pytest.raises(HTTPException) as error:
+        await create_article(_article(150), user)
+    assert error.value.status_code == 413
+    assert await daily_usage(user) == 0
+    assert await get_collection("articles").count_documents({}) == 0
+
+
+@pytest.mark.asyncio
+async def test_quota_refuses_once_spent(mongo, quota):
+    user = await _user()
+    await create_article(_article(60), user)
+    with pytest.raises(HTTPException) as error:
+        await create_article(_article(60), user)
+    assert error.value.status_code == 429
+    assert await daily_usage(user) == 60
+
+
+@pytest.mark.asyncio
+async def test_failed_insert_is_refunded(mongo, quota, monkeypatch):
+    user = await _user()
+    articles = type(get_collection("articles"))
+
+    async def fail(self, *args, **kwargs):
+        raise RuntimeError("insert failed")
+
+    monkeypatch.setattr(articles, "insert_one", fail)
+    with pytest.raises(RuntimeError):
+        await create_article(_article(60), user)
+    assert await daily_usage(user) == 0
+
+
+@pytest.mark.asyncio
+async def test_delete_before_generation_is_refunded(mongo, quota):
+    user = await _user()
+    waiting = await create_article(_article(30), user)
+    started = await create_article(_article(40), user)
+    await get_collection("articles").update_one({"_id": ObjectId(started.id)}, {"$set": {"audio_attempts": 1}})
+    assert await daily_usage(user) == 70
+
+    await delete_article(waiting.id, str(user["_id"]))
+    assert await daily_usage(user) == 40
+    await delete_article(started.id, str(user["_id"]))
+    assert await daily_usage(user) == 40  # Synthesis may already have been paid for
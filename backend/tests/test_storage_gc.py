@@ -0,0 +1,102 @@
+import os
+import time
+from datetime import datetime
+import pytest
+from bson import ObjectId
+from config import settings
+from database import get_collection
+from storage_gc import reconcile_storage
+from tts_service import tts_service, PARTIAL_SUFFIX
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(tts_service, "storage_path", tmp_path)
+    monkeypatch.setattr(settings, "storage_gc_grace_seconds", 60)
+    return tmp_path
+
+
+def _file(storage, name: str, age: float = 3600, size: int = 100):
+    path = storage / name
+    path.write_bytes(b"\0" * size)
+    modified = time.time() - age
+    os.utime(path, (modified, modified))
+    return path
+
+
+async def _article(audio: bool = True, **fields) -> ObjectId:
+    article_id = ObjectId()
+    await get_collection("articles").insert_one({
+        "_id": article_id,
+        "user_id": ObjectId(),
+        "collection_id": None,
+        "audio_url": f"/audio/{article_id}.wav" if audio else None,
+        "created_at": datetime.utcnow(),
+        **fields,
+    })
+    return article_id
+
+
+@pytest.mark.asyncio
+async def test_deletes_orphans_and_partials(mongo, storage):
+    kept = _file(storage, f"{await _article()}.wav")
+    orphan = _file(storage, f"{ObjectId()}.wav", size=300)
+    partial = _file(storage, f"{ObjectId()}.wav.1a2b3c4d{PARTIAL_SUFFIX}", size=50)
+
+    report = await reconcile_storage()
+
+    assert kept.exists() and not orphan.exists() and not partial.exists()
+    assert (report.orphans_deleted, report.partials_deleted, report.bytes_reclaimed) == (1, 1, 350)
+
+
+@pytest.mark.asyncio
+async def test_leaves_young_and_unrecognised_files(mongo, storage):
+    young = _file(storage, f"{ObjectId()}.wav", age=5)
+    young_partial = _file(storage, f"{ObjectId()}.wav.1a2b3c4d{PARTIAL_SUFFIX}", age=5)
+    unknown = [_file(storage, name) for name in ("notes.txt", "not-an-id.wav", ".DS_Store")]
+
+    report = await reconcile_storage()
+
+    assert all(path.exists() for path in [young, young_partial, *unknown])
+    assert report.files_scanned == 5
+    assert (report.orphans_deleted, report.partials_deleted) == (0, 0)
+
+
+@pytest.mark.asyncio
+async def test_dry_run_changes_nothing(mongo, storage):
+    _file(storage, f"{await _article()}.wav")
+    orphan = _file(storage, f"{ObjectId()}.wav")
+    partial = _file(storage, f"x.wav.1a2b3c4d{PARTIAL_SUFFIX}")
+    missing = await _article(audio_attempts=1)
+
+    report = await reconcile_storage(dry_run=True)
+
+    assert orphan.exists() and partial.exists()
+    assert (report.orphans_deleted, report.partials_deleted, report.missing_audio_flagged) == (1, 1, 1)
+    article = await get_collection("articles").find_one({"_id": missing})
+    assert article["audio_url"] is not None and article["audio_attempts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_missing_audio_is_queued_again(mongo, storage):
+    _file(storage, f"{await _article()}.wav")
+    missing = await _article(duration_seconds=42, audio_attempts=2)
+
+    report = await reconcile_storage()
+
+    assert report.missing_audio_flagged == 1
+    article = await get_collection("articles").find_one({"_id": missing})
+    assert article["audio_url"] is None and article["duration_seconds"] is None
+    assert article["audio_attempts"] == 0
+    assert article["audio_missing_at"] is not None
+
+
+@pytest.mark.asyncio
+async def test_empty_storage_skips_missing_audio_check(mongo, storage):
+    missing = await _article()
+
+    report = await reconcile_storage()
+
+    assert report.files_scanned == 0 and report.articles_scanned == 0
+    article = await get_collection("articles").find_one({"_id": missing})
+    assert article["audio_url"] == f"/audio/{missing}.wav"
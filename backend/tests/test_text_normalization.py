@@ -0,0 +1,52 @@
+import pytest
+from text_normalization import clean_text
+
+
+@pytest.mark.parametrize("line", [
+    "Copyright law in the United States has changed a lot over the last century.",
+    "Copyright holders rarely sue individual readers.",
+    "class struggle was a theme of the novel, as it was of the era",
+    "import duties rose sharply after the war (by about a third)",
+    "let the reader decide whether the argument holds",
+    "Home is where the heart is, or so the saying goes.",
+])
+def test_prose_is_kept(line):
+    assert line.rstrip(".") in clean_text(f"Intro.\n{line}\nOutro.")
+
+
+@pytest.mark.parametrize("line", [
+    "Copyright © 2024 Example Media",
+    "Copyright 2023 Example Media. All rights reserved.",
+    "© 2024 Example Media",
+    "Subscribe now",
+    "import os",
+    "from os.path import join, exists",
+    "import numpy as np",
+    "class Parser(object):",
+    "def main():",
+    "const total = items.length;",
+    "let x = 1",
+    "#include <stdio.h>",
+])
+def test_chrome_and_code_are_dropped(line):
+    assert clean_text(f"Intro.\n{line}\nOutro.").split() == ["Intro.", "Outro."]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Ms. Smith arrived.", "Miz Smith arrived."),
+    ("Dr. Jones agreed.", "Doctor Jones agreed."),
+    ("We saw 3 ms. latency.", "We saw 3 ms. latency."),
+    ("The timeout was 200 ms. Then it failed.", "The timeout was 200 ms. Then it failed."),
+])
+def test_titles_need_a_name(text, expected):
+    assert clean_text(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Contact us at news@example.com for more.", "Contact us for more."),
+    ("Email: tips@example.com", ""),
+    ("Send a note to tips@example.com today.", "Send a note to today."),
+    ("Look at what arrived from bob@example.com.", "Look at what arrived from."),
+])
+def test_emails_take_their_lead_in_with_them(text, expected):
+    assert clean_text(text) == expected
@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+from benchmarks.fake_tts_server import FakeTTSConfig, start_fake_tts_server
+from config import settings
+from tts_pool import TTSBackendPool, TTSRequestError
+
+PORTS = (5991, 5992, 5993)
+
+
+@pytest.mark.asyncio
+async def test_burst_spreads_across_backends():
+    servers = [await start_fake_tts_server(port, FakeTTSConfig(latency=0.05)) for port in PORTS]
+    pool = TTSBackendPool([f"http://127.0.0.1:{port}" for port in PORTS])
+    try:
+        # All started in the same loop tick, before any request has been sent
+        await asyncio.gather(*(pool.synthesize({"text": "hello"}) for _ in range(30)))
+        counts = [server.app["requests"] for server in servers]
+    finally:
+        await pool.close()
+        for server in servers:
+            await server.cleanup()
+
+    assert counts == [10, 10, 10]
+    assert all(backend.outstanding == 0 for backend in pool.backends)
+
+
+@pytest.mark.asyncio
+async def test_half_open_backend_admits_one_trial():
+    pool = TTSBackendPool(["http://127.0.0.1:1"])
+    backend = pool.backends[0]
+    backend.opened_at = 0.0  # Open, and long past its cool-down
+
+    first = pool.pick()
+    assert first is backend
+    task = pool._launch(backend, {"text": "hello"})
+    assert pool.pick() is None  # The trial holds the only slot
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+    assert backend.outstanding == 0
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_rejected_request_is_not_a_backend_failure():
+    config = FakeTTSConfig(latency=0.01, voices=("default",))
+    servers = [await start_fake_tts_server(port, config) for port in PORTS[:2]]
+    pool = TTSBackendPool([f"http://127.0.0.1:{port}" for port in PORTS[:2]])
+    try:
+        for _ in range(settings.tts_circuit_failure_threshold + 2):
+            with pytest.raises(TTSRequestError) as error:
+                await pool.synthesize({"text": "hello", "voice": "bogus"}, hedge=True)
+            assert error.value.status == 400
+        requests = sum(server.app["requests"] for server in servers)
+        audio = await pool.synthesize({"text": "hello", "voice": "default"})
+    finally:
+        await pool.close()
+        for server in servers:
+            await server.cleanup()
+
+    assert requests == settings.tts_circuit_failure_threshold + 2  # Never retried elsewhere
+    assert audio.startswith(b"RIFF")
+    assert not any(backend.circuit_open or backend.consecutive_failures for backend in pool.backends)
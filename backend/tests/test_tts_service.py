@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from pydantic import ValidationError
+from config import settings
+from models import TTSChunkRequest
+from text_normalization import TextChunk
+from tts_service import TTSService
+
+
+@pytest.mark.asyncio
+async def test_generation_chunks_skip_playback_cache_and_hedging(monkeypatch):
+    service = TTSService()
+    cached_key = service._chunk_key("cached", None, 1.0)
+    service.chunk_cache.put(cached_key, b"cached-audio")
+    calls = []
+
+    async def synthesize(text, rate=1.0, voice=None, hedge=False):
+        calls.append((text, hedge))
+        return f"{text}-audio".encode()
+
+    monkeypatch.setattr(service, "synthesize", synthesize)
+    monkeypatch.setattr("tts_service.concat_wav", lambda parts: b"|".join(parts))
+
+    audio = await service._synthesize_chunks([TextChunk("k1", "cached"), TextChunk("k2", "fresh")])
+
+    assert audio == b"cached-audio|fresh-audio"
+    assert calls == [("fresh", False)]
+    assert service._chunk_key("fresh", None, 1.0) not in service.chunk_cache
+    await service.pool.close()
+
+
+@pytest.mark.asyncio
+async def test_chunks_are_cached_shared_and_prefetched(monkeypatch):
+    service = TTSService()
+    release = asyncio.Event()
+    calls = []
+
+    async def synthesize(text, rate=1.0, voice=None, hedge=False):
+        calls.append(text)
+        await release.wait()
+        return f"{text}-audio".encode()
+
+    monkeypatch.setattr(service, "synthesize", synthesize)
+    upcoming = [f"next {i}" for i in range(settings.tts_prefetch_chunks + 3)]
+
+    # Two identical requests while the first is in flight share one synthesis
+    first = asyncio.create_task(service.synthesize_chunk("hello", upcoming=upcoming))
+    second = asyncio.create_task(service.synthesize_chunk("hello"))
+    await asyncio.sleep(0)
+    release.set()
+    assert await first == (b"hello-audio", False)
+    assert await second == (b"hello-audio", False)
+
+    # Only the first tts_prefetch_chunks upcoming chunks were started
+    assert calls == ["hello", *upcoming[:settings.tts_prefetch_chunks]]
+    await asyncio.sleep(0)
+    assert await service.synthesize_chunk("hello") == (b"hello-audio", True)
+    assert await service.synthesize_chunk(upcoming[0]) == (b"next 0-audio", True)
+    assert len(calls) == 1 + settings.tts_prefetch_chunks
+    await service.pool.close()
+
+
+def test_chunk_request_limits():
+    TTSChunkRequest(text="x" * settings.tts_chunk_max_chars, upcoming=["y"] * settings.tts_prefetch_chunks)
+    with pytest.raises(ValidationError):
+        TTSChunkRequest(text="x" * (settings.tts_chunk_max_chars + 1))
+    with pytest.raises(ValidationError):
+        TTSChunkRequest(text="x", upcoming=["y"] * (settings.tts_prefetch_chunks + 1))
+    with pytest.raises(ValidationError):
+        TTSChunkRequest(text="x", upcoming=["y" * (settings.tts_chunk_max_chars + 1)])
@@ -0,0 +1,255 @@
+"""
+Text normalization before synthesis
+
+Scraped article text carries a lot that is slow to synthesize and
+pointless to listen to: URLs, code blocks, footnote markers, navigation
+boilerplate and runs of whitespace. normalize_text strips or condenses
+it, expands common abbreviations, and splits the result into stable
+sentence chunks whose keys depend only on their text, so chunk audio
+can be cached and reused.
+
+All patterns are compiled once and applied as whole-text passes, with
+cheap substring checks skipping passes that can't match, which keeps the
+stage fast on very large inputs.
+"""
+import hashlib
+import re
+from dataclasses import dataclass, field
+
+MAX_CHUNK_CHARS = 500
+
+# Fenced code blocks (``` or ~~~) and lines that look like code
+_FENCED_CODE = re.compile(r"(?:```|~~~)[^\n]*\n.*?(?:```|~~~)", re.DOTALL)
+_CODE_ENDINGS = ("{", "}", ");", "];")
+_CODE_MARKERS = ("//", "#include")
+# Keywords that also start ordinary sentences ("Class struggle was...", "Import duties
+# rose..."), so these lines only count as code when they carry code punctuation
+_CODE_KEYWORDS = ("import ", "def ", "class ", "function ", "const ", "let ", "var ", "$ ")
+_CODE_PUNCTUATION = re.compile(r"\w\(|=|[;:]$")  # A call, an assignment, or a statement or block end
+# Bare imports have no punctuation: "import os.path as p", "from x.y import a, b"
+_BARE_IMPORT = re.compile(r"import [\w.]+(?: as \w+)?(?:, [\w.]+)*|from [\w.]+ import (?:\*|\w+(?:, \w+)*)")
+
+_URL = re.compile(r"(?:https?://|www\.)[^\s<>()\[\]]+")
+# Emails are found from the "@" outwards - scanning for the local part first
+# would start a match at every word. Bounded repeats keep matching linear.
+_EMAIL_DOMAIN = re.compile(r"@[\w-]{1,63}(?:\.[\w-]{1,63}){1,8}\b")
+_EMAIL_LOCAL = re.compile(r"(?<![\w.+-])[\w.+-]{1,64}\Z")
+# "at" or "email:" introducing an address goes with it: "Contact us at x@y.com for more"
+_EMAIL_LEAD_IN = re.compile(r"\b(?:at|e-?mail(?: us)?:?)[ \t]+\Z", re.IGNORECASE)
+
+# [1], [12], [a], [note 3], [citation needed], and superscript digits
+_FOOTNOTE = re.compile(
+    r"\[(?:\d{1,3}|[a-z]|note \d+|citation needed|clarification needed|edit)\]",
+    re.IGNORECASE
+)
+_SUPERSCRIPTS = "¹²³⁰⁴⁵⁶⁷⁸⁹"
+_SUPERSCRIPT = re.compile(f"[{_SUPERSCRIPTS}]+")
+
+# Short lines that are page chrome rather than article text
+_BOILERPLATE_LINE = re.compile(
+    r"(?:skip to (?:main )?content|menu|home|search|sign in|log in|sign up|subscribe(?: now)?|"
+    r"share(?: this(?: article)?)?(?: on \w+)?|tweet|advertisement|sponsored|accept(?: all)? cookies|"
+    r"cookie (?:settings|policy)|privacy policy|terms of (?:use|service)|related (?:articles|stories|posts)|"
+    r"read more|continue reading|back to top|show comments|\d+ comments?|previous|next|"
+    r"follow us(?: on \w+)?|newsletter|all rights reserved.*|©.*|copyright (?:©|\(c\)|\d{4}).*)[ \t]*[:|»›>]*",
+    re.IGNORECASE
+)
+# Longer lines are prose, even when they start like a menu item or copyright notice
+_BOILERPLATE_MAX_CHARS = 80
+
+# Common abbreviations, expanded so the voice doesn't spell them out or stop mid-sentence
+# Only expanded as "Ms. Smith", never as "3 ms." or at the end of a sentence
+_TITLES = {"dr.", "mr.", "mrs.", "ms.", "prof."}
+_ABBREVIATIONS = {
+    "e.g.": "for example",
+    "i.e.": "that is",
+    "etc.": "et cetera",
+    "vs.": "versus",
+    "approx.": "approximately",
+    "dr.": "Doctor",
+    "mr.": "Mister",
+    "mrs.": "Missus",
+    "ms.": "Miz",
+    "prof.": "Professor",
+    "jan.": "January",
+    "feb.": "February",
+    "aug.": "August",
+    "sept.": "September",
+    "oct.": "October",
+    "nov.": "November",
+    "dec.": "December",
+}
+# Any short word ending in a full stop; the callback keeps the ones that aren't
+# abbreviations. Much faster than an alternation tried at every position.
+_ABBREVIATION = re.compile(r"\b[A-Za-z]{1,6}\.(?:[A-Za-z]\.)?(?=\s|$)")
+# The literal comes first so the regex engine can skip ahead to it
+_NUMBER_SIGN = re.compile(r"No\.(?<!\wNo\.)\s*(?=\d)")
+
+_SPACE_RUN = re.compile(r"  +")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_EMPTY_BRACKETS = re.compile(r"\(\s*\)|\[\s*\]")
+# Whitespace is condensed by the time these run, so a single space is enough
+_SPACE_BEFORE_PUNCTUATION = re.compile(r" ([,.;:!?])")
+
+# Whitespace after sentence punctuation (optionally followed by a closing quote), or a
+# line break. Matching the whitespace first and looking back is cheaper than the reverse.
+_SENTENCE_END = re.compile(r"[ \n](?:(?<=[.!?][ \n])|(?<=[.!?][\"'”’)][ \n]))\s*|\n+")
+
+
+@dataclass
+class TextChunk:
+    key: str
+    text: str
+
+
+@dataclass
+class NormalizedText:
+    text: str
+    original_chars: int
+    chunks: list[TextChunk] = field(default_factory=list)
+
+    @property
+    def removed_chars(self) -> int:
+        return max(0, self.original_chars - len(self.text))
+
+
+def chunk_key(text: str) -> str:
+    """Deterministic cache key for a chunk of text"""
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:20]
+
+
+def _expand_abbreviation(match: re.Match) -> str:
+    word = match.group(0)
+    abbreviation = word.lower()
+    expanded = _ABBREVIATIONS.get(abbreviation)
+    if expanded is None:
+        return word
+    rest = match.string[match.end():match.end() + 2]
+    if abbreviation in _TITLES:
+        if word[0].isupper() and len(rest) == 2 and rest[1].isupper():
+            return expanded
+        return word
+    # Keep the full stop when the abbreviation also ended the sentence
+    if not rest or (len(rest) == 2 and rest[1].isupper()):
+        return expanded + "."
+    return expanded
+
+
+def _is_code_line(line: str) -> bool:
+    if line.endswith(_CODE_ENDINGS):
+        return True
+    if line.endswith(";") and "=" in line:  # Assignment statement
+        return True
+    if line.startswith(_CODE_MARKERS):
+        return True
+    if line.startswith(_CODE_KEYWORDS):
+        return _CODE_PUNCTUATION.search(line) is not None or _BARE_IMPORT.fullmatch(line) is not None
+    return line.startswith("from ") and _BARE_IMPORT.fullmatch(line) is not None
+
+
+def _strip_lines(text: str) -> str:
+    """Drop lines that look like code or page chrome, in one pass over the lines"""
+    lines = text.split("\n")
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if _is_code_line(stripped) or (
+            len(stripped) <= _BOILERPLATE_MAX_CHARS and _BOILERPLATE_LINE.fullmatch(stripped)
+        ):
+            lines[i] = ""
+    return "\n".join(lines)
+
+
+def _strip_emails(text: str) -> str:
+    parts = []
+    pos = 0
+    for match in _EMAIL_DOMAIN.finditer(text):
+        local = _EMAIL_LOCAL.search(text, max(pos, match.start() - 64), match.start())
+        if local is None:
+            continue
+        start = local.start()
+        lead_in = _EMAIL_LEAD_IN.search(text, max(pos, start - 12), start)
+        if lead_in is not None:
+            start = lead_in.start()
+        parts.append(text[pos:start])
+        pos = match.end()
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+def clean_text(text: str) -> str:
+    """Strip unspeakable content and condense whitespace"""
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    # The cheap substring checks skip whole passes on text that can't match
+    if "```" in text or "~~~" in text:
+        text = _FENCED_CODE.sub("\n", text)
+    text = _strip_lines(text)
+    if "://" in text or "www." in text:
+        text = _URL.sub("", text)
+    if "@" in text:
+        text = _strip_emails(text)
+    if "[" in text:
+        text = _FOOTNOTE.sub("", text)
+    if any(c in text for c in _SUPERSCRIPTS):
+        text = _SUPERSCRIPT.sub("", text)
+    text = _EMPTY_BRACKETS.sub("", text)
+
+    # Condense whitespace before expanding, so the patterns below never scan long runs
+    text = text.replace("\t", " ").replace("\u00a0", " ").replace("\u200b", " ")
+    text = _SPACE_RUN.sub(" ", text)
+    text = text.replace(" \n", "\n").replace("\n ", "\n")
+    text = _BLANK_LINES.sub("\n\n", text)
+
+    if "No." in text:
+        text = _NUMBER_SIGN.sub("number ", text)
+    text = _ABBREVIATION.sub(_expand_abbreviation, text)
+    text = text.replace(" %", "%").replace("%", " percent")
+    text = text.replace(" & ", " and ").replace(" @ ", " at ")
+    text = _SPACE_BEFORE_PUNCTUATION.sub(r"\1", text)
+    return text.strip()
+
+
+def split_chunks(text: str, max_chars: int = MAX_CHUNK_CHARS) -> list[TextChunk]:
+    """
+    Pack whole sentences into chunks of up to max_chars. Boundaries only
+    depend on the text, so the same text always yields the same chunks.
+    """
+    chunks = []
+    current = []
+    size = 0
+    for sentence in _SENTENCE_END.split(text):
+        sentence = sentence.replace("\n", " ").strip()
+        if not sentence:
+            continue
+        # Hard-wrap sentences that are longer than a chunk on their own. Walk an
+        # offset rather than re-slicing the remainder, which is quadratic.
+        start = 0
+        while len(sentence) - start > max_chars:
+            cut = sentence.rfind(" ", start, start + max_chars)
+            cut = cut if cut > start else start + max_chars
+            if current:
+                chunks.append(" ".join(current))
+                current, size = [], 0
+            chunks.append(sentence[start:cut].strip())
+            start = cut + 1 if sentence[cut] == " " else cut
+        if start:
+            sentence = sentence[start:].strip()
+        if size and size + 1 + len(sentence) > max_chars:
+            chunks.append(" ".join(current))
+            current, size = [], 0
+        current.append(sentence)
+        size += len(sentence) + (1 if size else 0)
+    if current:
+        chunks.append(" ".join(current))
+    return [TextChunk(key=chunk_key(c), text=c) for c in chunks if c]
+
+
+def normalize_text(text: str, max_chunk_chars: int = MAX_CHUNK_CHARS) -> NormalizedText:
+    """Full normalization stage: clean, expand, and chunk"""
+    cleaned = clean_text(text)
+    return NormalizedText(
+        text=cleaned,
+        original_chars=len(text),
+        chunks=split_chunks(cleaned, max_chunk_chars)
+    )
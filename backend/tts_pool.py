@@ -0,0 +1,242 @@
+"""
+TTS backend pool - least-outstanding routing, health probes, circuit
+breaking and hedged requests across several TTS servers
+"""
+import aiohttp
+import asyncio
+import time
+from typing import Optional
+from config import settings
+from metrics import tts_synthesis_duration_seconds, tts_synthesis_bytes_total
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 4xx answers that say the backend is overloaded or slow rather than the request bad
+_BACKEND_BUSY = (408, 429)
+
+
+class TTSRequestError(Exception):
+    """A backend rejected the request itself (4xx), so no other backend would accept it"""
+
+    def __init__(self, status: int, detail: str):
+        super().__init__(f"TTS request rejected: {status} {detail}")
+        self.status = status
+        self.detail = detail
+
+
+class TTSBackend:
+    """One TTS server with its load and circuit breaker state"""
+
+    def __init__(self, url: str):
+        self.url = url.rstrip("/")
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None  # Set while the circuit is open
+        self.healthy = True
+        self.latency_ewma = 0.0
+        self.probe_latency: Optional[float] = None  # Seconds taken by the last /health probe
+
+    @property
+    def circuit_open(self) -> bool:
+        return self.opened_at is not None
+
+    def available(self, now: float) -> bool:
+        """Whether new requests may be routed to this backend"""
+        if not self.circuit_open:
+            return self.healthy
+        # Half-open: after the cool-down let a single trial request through
+        cooled_down = now - self.opened_at >= settings.tts_circuit_reset_seconds
+        return cooled_down and self.outstanding == 0
+
+    def record_success(self, elapsed: float):
+        self.consecutive_failures = 0
+        self.healthy = True
+        if self.circuit_open:
+            logger.info(f"TTS backend {self.url} recovered, closing circuit")
+            self.opened_at = None
+        self.latency_ewma = elapsed if not self.latency_ewma else 0.8 * self.latency_ewma + 0.2 * elapsed
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.circuit_open:
+            # Failed half-open trial - start a new cool-down
+            self.opened_at = time.monotonic()
+        elif self.consecutive_failures >= settings.tts_circuit_failure_threshold:
+            logger.warning(f"TTS backend {self.url} failing, opening circuit")
+            self.opened_at = time.monotonic()
+
+
+class TTSBackendPool:
+    """Routes synthesis requests across a pool of TTS servers"""
+
+    def __init__(self, urls: list[str]):
+        self.backends = [TTSBackend(url) for url in urls]
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._health_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start background health probes"""
+        if self._health_task is None and settings.tts_health_check_interval > 0:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def close(self):
+        """Stop health probes and close the HTTP session"""
+        if self._health_task:
+            self._health_task.cancel()
+            self._health_task = None
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=settings.tts_request_timeout)
+            )
+        return self._session
+
+    def pick(self, exclude: tuple = ()) -> Optional[TTSBackend]:
+        """Choose the available backend with the fewest requests in flight"""
+        now = time.monotonic()
+        candidates = [b for b in self.backends if b not in exclude and b.available(now)]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda b: (b.outstanding, b.latency_ewma))
+
+    async def synthesize(self, payload: dict, hedge: bool = False) -> bytes:
+        """
+        Synthesize on the least loaded backend. With hedge=True, a second
+        backend is raced against the first if it hasn't answered within
+        tts_hedge_after_seconds. A failed request is retried once elsewhere,
+        but a rejected one raises TTSRequestError straight away.
+        """
+        primary = self.pick()
+        if primary is None:
+            raise Exception("No TTS backend available")
+
+        attempts = {self._launch(primary, payload): primary}
+        hedge_after = settings.tts_hedge_after_seconds if hedge else None
+        retried = False
+        error = None
+
+        try:
+            while attempts:
+                done, _ = await asyncio.wait(
+                    attempts,
+                    timeout=hedge_after,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    # Slow response - hedge on another backend, once
+                    hedge_after = None
+                    backup = self.pick(exclude=tuple(attempts.values()))
+                    if backup is not None:
+                        logger.info(f"Hedging slow TTS request on {backup.url}")
+                        attempts[self._launch(backup, payload)] = backup
+                    continue
+
+                for task in done:
+                    backend = attempts.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+                    if isinstance(error, TTSRequestError):
+                        raise error
+
+                    if not attempts and not retried:
+                        retried = True
+                        fallback = self.pick(exclude=(backend,))
+                        if fallback is not None:
+                            attempts[self._launch(fallback, payload)] = fallback
+
+            raise error
+        finally:
+            for task in attempts:
+                task.cancel()
+
+    def _launch(self, backend: TTSBackend, payload: dict) -> asyncio.Task:
+        """
+        Start a request on backend. Its slot is taken now rather than when the
+        task first runs, so a burst of calls in one loop tick sees each other's
+        load and a half-open backend admits only one trial.
+        """
+        backend.outstanding += 1
+        task = asyncio.create_task(self._request(backend, payload))
+
+        def release(_):
+            backend.outstanding -= 1
+
+        # A done callback also fires for tasks cancelled before they ever ran
+        task.add_done_callback(release)
+        return task
+
+    async def _request(self, backend: TTSBackend, payload: dict) -> bytes:
+        """Send one synthesis request, updating the backend's health"""
+        started = time.monotonic()
+        try:
+            session = self._get_session()
+            async with session.post(f"{backend.url}/synthesize", json=payload) as response:
+                if 400 <= response.status < 500 and response.status not in _BACKEND_BUSY:
+                    # The caller's input, e.g. an unknown voice - the backend itself is fine
+                    detail = (await response.text())[:200]
+                    tts_synthesis_duration_seconds.labels(backend.url, "rejected").observe(time.monotonic() - started)
+                    raise TTSRequestError(response.status, detail)
+                if response.status != 200:
+                    raise Exception(f"TTS server error: {response.status}")
+                audio = await response.read()
+        except (asyncio.CancelledError, TTSRequestError):
+            raise
+        except Exception:
+            backend.record_failure()
+            tts_synthesis_duration_seconds.labels(backend.url, "failure").observe(time.monotonic() - started)
+            raise
+
+        elapsed = time.monotonic() - started
+        backend.record_success(elapsed)
+        tts_synthesis_duration_seconds.labels(backend.url, "success").observe(elapsed)
+        tts_synthesis_bytes_total.labels(backend.url).inc(len(audio))
+        return audio
+
+    async def _health_loop(self):
+        """Probe every backend's /health endpoint on an interval"""
+        while True:
+            await asyncio.gather(*(self._probe(b) for b in self.backends))
+            await asyncio.sleep(settings.tts_health_check_interval)
+
+    async def check_health(self) -> list[dict]:
+        """Probe every backend now and report its state"""
+        await asyncio.gather(*(self._probe(b) for b in self.backends))
+        now = time.monotonic()
+        return [
+            {
+                "url": b.url,
+                "healthy": b.healthy,
+                "circuit_open": b.circuit_open,
+                "available": b.available(now),
+                "outstanding": b.outstanding,
+                "latency_ms": round(b.probe_latency * 1000, 1) if b.probe_latency is not None else None,
+            }
+            for b in self.backends
+        ]
+
+    async def _probe(self, backend: TTSBackend):
+        started = time.monotonic()
+        try:
+            session = self._get_session()
+            async with session.get(
+                f"{backend.url}/health",
+                timeout=aiohttp.ClientTimeout(total=settings.tts_health_check_timeout)
+            ) as response:
+                healthy = response.status == 200
+        except Exception:
+            healthy = False
+        backend.probe_latency = time.monotonic() - started
+
+        if healthy != backend.healthy:
+            logger.warning(f"TTS backend {backend.url} is now {'healthy' if healthy else 'unhealthy'}")
+        backend.healthy = healthy
+        if healthy and backend.circuit_open:
+            # Let the next request act as the half-open trial immediately
+            backend.opened_at = time.monotonic() - settings.tts_circuit_reset_seconds
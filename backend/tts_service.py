@@ -1,59 +1,230 @@
 """
 Text-to-Speech service - integrates with your existing TTS server
 """
-import aiohttp
+import asyncio
 import os
+import shutil
+import uuid
+from collections import OrderedDict
 from pathlib import Path
+from typing import Awaitable, Callable, Optional
 from config import settings
+from tts_pool import TTSBackendPool
+from metrics import tts_chunk_cache_requests_total
+from text_normalization import TextChunk, chunk_key
 import logging
 from pydub import AudioSegment
 import io
+import wave
 
 logger = logging.getLogger(__name__)
 
+# Audio files being written; any left over belong to a crashed job
+PARTIAL_SUFFIX = ".part"
+
+
+class ChunkCache:
+    """LRU cache of synthesized audio chunks, bounded by total size in bytes"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self._entries: OrderedDict[tuple, bytes] = OrderedDict()
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._entries
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        """Return cached audio and mark it as recently used"""
+        audio = self._entries.get(key)
+        if audio is not None:
+            self._entries.move_to_end(key)
+        return audio
+
+    def put(self, key: tuple, audio: bytes):
+        """Store audio, evicting least recently used chunks to stay in budget"""
+        if len(audio) > self.max_bytes:
+            return
+        if key in self._entries:
+            self.size_bytes -= len(self._entries.pop(key))
+        self._entries[key] = audio
+        self.size_bytes += len(audio)
+        while self.size_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size_bytes -= len(evicted)
+
+
+def concat_wav(parts: list[bytes]) -> bytes:
+    """Join WAV clips that share one format into a single WAV"""
+    if len(parts) == 1:
+        return parts[0]
+    output = io.BytesIO()
+    with wave.open(output, "wb") as joined:
+        for i, part in enumerate(parts):
+            with wave.open(io.BytesIO(part), "rb") as clip:
+                if i == 0:
+                    joined.setparams(clip.getparams())
+                joined.writeframes(clip.readframes(clip.getnframes()))
+    return output.getvalue()
+
 
 class TTSService:
     """Service for generating audio from text"""
-    
+
     def __init__(self):
-        self.tts_url = settings.tts_server_url
+        self.pool = TTSBackendPool(settings.tts_backend_urls)
         self.storage_path = Path(settings.local_storage_path)
         self.storage_path.mkdir(parents=True, exist_ok=True)
-    
-    async def generate_audio(self, text: str, article_id: str) -> tuple[str, int]:
+        self.chunk_cache = ChunkCache(settings.tts_chunk_cache_mb * 1024 * 1024)
+        self._pending_chunks: dict[tuple, asyncio.Task] = {}
+
+    async def synthesize(
+        self,
+        text: str,
+        rate: float = 1.0,
+        voice: Optional[str] = None,
+        hedge: bool = False
+    ) -> bytes:
+        """Send text to the TTS backend pool and return the raw audio bytes"""
+        payload = {"text": text, "rate": rate}
+        if voice:
+            payload["voice"] = voice
+        return await self.pool.synthesize(payload, hedge=hedge)
+
+    async def generate_audio(
+        self,
+        text: str,
+        article_id: str,
+        chunks: Optional[list[TextChunk]] = None,
+        on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None
+    ) -> tuple[str, int]:
         """
-        Generate audio from text using TTS server
+        Generate audio from text using TTS server. When normalized chunks are
+        given they are synthesized separately and joined into one file.
+        on_progress(done, total) is awaited after each chunk.
         Returns: (audio_file_path, duration_in_seconds)
         """
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(
-                    f"{self.tts_url}/synthesize",
-                    json={"text": text, "rate": 1.0}
-                ) as response:
-                    if response.status != 200:
-                        raise Exception(f"TTS server error: {response.status}")
-                    
-                    audio_data = await response.read()
-                    
-                    # Save audio file
-                    audio_filename = f"{article_id}.wav"
-                    audio_path = self.storage_path / audio_filename
-                    
-                    with open(audio_path, 'wb') as f:
-                        f.write(audio_data)
-                    
-                    # Calculate duration
-                    duration = self._get_audio_duration(audio_path)
-                    
-                    logger.info(f"Generated audio for article {article_id}, duration: {duration}s")
-                    
-                    return str(audio_path), duration
-        
+            if chunks:
+                audio_data = await self._synthesize_chunks(chunks, on_progress)
+            else:
+                audio_data = await self.synthesize(text)
+
+            # Save audio file. Write a partial file and rename it into place, so a
+            # failed write never leaves a truncated {article_id}.wav behind
+            audio_filename = f"{article_id}.wav"
+            audio_path = self.storage_path / audio_filename
+            partial_path = self.storage_path / f"{audio_filename}.{uuid.uuid4().hex[:8]}{PARTIAL_SUFFIX}"
+
+            try:
+                with open(partial_path, 'wb') as f:
+                    f.write(audio_data)
+                os.replace(partial_path, audio_path)
+            except BaseException:
+                partial_path.unlink(missing_ok=True)
+                raise
+
+            # Calculate duration
+            duration = self._get_audio_duration(audio_path)
+
+            logger.info(f"Generated audio for article {article_id}, duration: {duration}s")
+
+            return str(audio_path), duration
+
         except Exception as e:
             logger.error(f"Error generating audio: {e}")
             raise
-    
+
+    async def _synthesize_chunks(
+        self,
+        chunks: list[TextChunk],
+        on_progress: Optional[Callable[[int, int], Awaitable[None]]] = None
+    ) -> bytes:
+        """
+        Synthesize chunks with bounded concurrency and join them in order.
+        Chunks already cached or in flight for playback are reused, but new
+        ones are not cached: one long article would evict every chunk live
+        playback needs. Background work is never hedged either.
+        """
+        semaphore = asyncio.Semaphore(settings.generation_chunk_concurrency)
+        done = 0
+
+        async def one(chunk: TextChunk) -> bytes:
+            nonlocal done
+            async with semaphore:
+                key = self._chunk_key(chunk.text, None, 1.0)
+                audio = self.chunk_cache.get(key)
+                if audio is None:
+                    task = self._pending_chunks.get(key)
+                    audio = await asyncio.shield(task) if task else await self.synthesize(chunk.text)
+            done += 1
+            if on_progress is not None:
+                await on_progress(done, len(chunks))
+            return audio
+
+        parts = await asyncio.gather(*(one(chunk) for chunk in chunks))
+        return concat_wav(parts)
+
+    async def synthesize_chunk(
+        self,
+        text: str,
+        voice: Optional[str] = None,
+        rate: float = 1.0,
+        upcoming: list[str] = ()
+    ) -> tuple[bytes, bool]:
+        """
+        Synthesize one playback chunk through the chunk cache and start
+        synthesizing the next chunks so they are ready when playback reaches them.
+        Returns: (audio_bytes, served_from_cache)
+        """
+        key = self._chunk_key(text, voice, rate)
+        audio = self.chunk_cache.get(key)
+        task = None
+        if audio is None:
+            task = self._pending_chunks.get(key)
+            tts_chunk_cache_requests_total.labels("in_flight" if task else "miss").inc()
+            task = task or self._start_chunk(key, text, voice, rate)
+        else:
+            tts_chunk_cache_requests_total.labels("hit").inc()
+
+        self.prefetch_chunks(upcoming, voice, rate)
+
+        if task is None:
+            return audio, True
+        # Shield so a disconnecting client doesn't cancel work other requests share
+        return await asyncio.shield(task), False
+
+    def prefetch_chunks(self, chunks: list[str], voice: Optional[str] = None, rate: float = 1.0):
+        """Start synthesizing upcoming chunks that are neither cached nor in flight"""
+        for text in chunks[:settings.tts_prefetch_chunks]:
+            key = self._chunk_key(text, voice, rate)
+            if key in self.chunk_cache or key in self._pending_chunks:
+                continue
+            self._start_chunk(key, text, voice, rate)
+
+    def _start_chunk(self, key: tuple, text: str, voice: Optional[str], rate: float) -> asyncio.Task:
+        """Create a shared synthesis task for a chunk"""
+        task = asyncio.create_task(self.synthesize(text, rate=rate, voice=voice, hedge=True))
+        self._pending_chunks[key] = task
+        task.add_done_callback(lambda t: self._finish_chunk(key, t))
+        return task
+
+    def _finish_chunk(self, key: tuple, task: asyncio.Task):
+        """Move a finished chunk from the in-flight table into the cache"""
+        self._pending_chunks.pop(key, None)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            logger.warning(f"Chunk synthesis failed: {error}")
+            return
+        self.chunk_cache.put(key, task.result())
+
+    @staticmethod
+    def _chunk_key(text: str, voice: Optional[str], rate: float) -> tuple:
+        """Cache key for a chunk - same text, voice and rate give the same audio"""
+        return (chunk_key(text), voice or "", round(rate, 2))
+
     def _get_audio_duration(self, audio_path: Path) -> int:
         """Get audio duration in seconds"""
         try:
@@ -62,13 +233,29 @@ class TTSService:
         except Exception as e:
             logger.error(f"Error getting audio duration: {e}")
             return 0
+
+    def link_audio(self, source_article_id: str, article_id: str) -> bool:
+        """Give an article the audio file of another article with identical content"""
+        source = self.storage_path / f"{source_article_id}.wav"
+        target = self.storage_path / f"{article_id}.wav"
+        try:
+            if target.exists():
+                target.unlink()
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copyfile(source, target)
+            return True
+        except Exception as e:
+            logger.warning(f"Could not reuse audio of article {source_article_id}: {e}")
+            return False
     
     def get_audio_url(self, article_id: str) -> str:
         """Get URL for audio file"""
         # For local storage, return relative path
         # In production, this would be an S3 URL or CDN URL
         return f"/audio/{article_id}.wav"
-    
+
     def delete_audio(self, article_id: str):
         """Delete audio file"""
         try:
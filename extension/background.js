@@ -16,6 +16,16 @@ chrome.runtime.onMessage.addListener((request, sender, sendResponse) => {
     return true;
   }
 
+  if (request.action === "synthesizeCloud") {
+    synthesizeSpeechCloud(
+      request.token,
+      request.text,
+      request.rate,
+      request.upcoming
+    ).then(sendResponse);
+    return true;
+  }
+
   // Cast actions
   if (request.action === "castStatus") {
     checkCastStatus().then(sendResponse);
@@ -135,21 +145,37 @@ async function synthesizeSpeech(text, rate) {
       throw new Error("TTS synthesis failed");
     }
 
-    const audioBlob = await response.blob();
-    const reader = new FileReader();
+    return await audioResponseToData(response);
+  } catch (error) {
+    return {
+      success: false,
+      error: error.message,
+    };
+  }
+}
 
-    return new Promise((resolve, reject) => {
-      reader.onloadend = () => {
-        resolve({
-          success: true,
-          audioData: reader.result,
-        });
-      };
-      reader.onerror = () => {
-        reject(new Error("Failed to read audio data"));
-      };
-      reader.readAsDataURL(audioBlob);
+// Synthesize through the backend, which caches chunks and prefetches the
+// upcoming ones so there is no gap at chunk boundaries
+async function synthesizeSpeechCloud(token, text, rate, upcoming = []) {
+  try {
+    const response = await fetch(`${API_URL}/tts/chunk`, {
+      method: "POST",
+      headers: {
+        "Content-Type": "application/json",
+        Authorization: `Bearer ${token}`,
+      },
+      body: JSON.stringify({
+        text: text,
+        rate: rate || 1.0,
+        upcoming: upcoming,
+      }),
     });
+
+    if (!response.ok) {
+      throw new Error("TTS synthesis failed");
+    }
+
+    return await audioResponseToData(response);
   } catch (error) {
     return {
       success: false,
@@ -158,6 +184,24 @@ async function synthesizeSpeech(text, rate) {
   }
 }
 
+async function audioResponseToData(response) {
+  const audioBlob = await response.blob();
+  const reader = new FileReader();
+
+  return new Promise((resolve, reject) => {
+    reader.onloadend = () => {
+      resolve({
+        success: true,
+        audioData: reader.result,
+      });
+    };
+    reader.onerror = () => {
+      reject(new Error("Failed to read audio data"));
+    };
+    reader.readAsDataURL(audioBlob);
+  });
+}
+
 // ============================================================================
 // CAST FUNCTIONS
 // ============================================================================
@@ -1265,6 +1265,7 @@ async function playWithServer() {
 
   // Get chunk of words to synthesize (avoid too long chunks)
   const chunkSize = 50;
+  const prefetchChunks = 2;
   const endIndex = Math.min(currentWordIndex + chunkSize, words.length);
   const textChunk = words.slice(currentWordIndex, endIndex).join(" ");
 
@@ -1275,11 +1276,32 @@ async function playWithServer() {
     playbackRate = parseFloat(speedSlider.value);
 
     // Request audio from background worker
-    const response = await chrome.runtime.sendMessage({
-      action: "synthesize",
-      text: textChunk,
-      rate: playbackRate,
-    });
+    let response = null;
+    if (authManager.isAuthenticated()) {
+      // Backend caches chunks and prefetches the upcoming ones while this plays
+      const upcoming = [];
+      for (
+        let start = endIndex;
+        start < words.length && upcoming.length < prefetchChunks;
+        start += chunkSize
+      ) {
+        upcoming.push(words.slice(start, start + chunkSize).join(" "));
+      }
+      response = await chrome.runtime.sendMessage({
+        action: "synthesizeCloud",
+        token: authManager.getToken(),
+        text: textChunk,
+        rate: playbackRate,
+        upcoming: upcoming,
+      });
+    }
+    if (!response || !response.success) {
+      response = await chrome.runtime.sendMessage({
+        action: "synthesize",
+        text: textChunk,
+        rate: playbackRate,
+      });
+    }
 
     if (!response.success) {
       throw new Error(response.error);